@@ -1,192 +1,303 @@
 # Temel Postür Analiz Sistemi / Basic Posture Analysis System
+import os
 import cv2
 import mediapipe as mp
 import gradio as gr
 import numpy as np
+import threading
+from frame_pipeline import resize_for_inference
 
 # MediaPipe başlatma / Initialize MediaPipe
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
+# Landmark indeksleri, içe aktarmada bir kez çözülür / Landmark indices, resolved once at import
+_NOSE = mp_pose.PoseLandmark.NOSE.value
+_LEFT_SHOULDER = mp_pose.PoseLandmark.LEFT_SHOULDER.value
+_RIGHT_SHOULDER = mp_pose.PoseLandmark.RIGHT_SHOULDER.value
+_LEFT_ELBOW = mp_pose.PoseLandmark.LEFT_ELBOW.value
+_RIGHT_ELBOW = mp_pose.PoseLandmark.RIGHT_ELBOW.value
+_LEFT_WRIST = mp_pose.PoseLandmark.LEFT_WRIST.value
+_RIGHT_WRIST = mp_pose.PoseLandmark.RIGHT_WRIST.value
+_LEFT_HIP = mp_pose.PoseLandmark.LEFT_HIP.value
+_RIGHT_HIP = mp_pose.PoseLandmark.RIGHT_HIP.value
+_LEFT_KNEE = mp_pose.PoseLandmark.LEFT_KNEE.value
+_RIGHT_KNEE = mp_pose.PoseLandmark.RIGHT_KNEE.value
+
 class BasicPostureAnalyzer:
     """Temel postür analiz sınıfı / Basic posture analyzer class"""
     
-    def __init__(self):
+    # Önbellek anahtarı için nicemleme ölçeği / Quantization scale for the feedback cache key
+    _CACHE_SCALE = 1024
+    
+    # Vücut yokken sabit metin / Fixed text when no body is detected
+    _NO_BODY_FEEDBACK = "\n".join((
+        "❌ Vücut tespit edilemedi / Body not detected",
+        "📍 Kameraya tam vücut görünecek şekilde durun / Stand so full body is visible"
+    ))
+    
+    # Hareketsiz sahne: 32x32 gri küçük resimde ortalama fark eşiği / Still scene: mean difference threshold on a 32x32 gray thumbnail
+    _STILL_DIFF = 2.0
+    
+    # Tam tespit yapılmadan yeniden kullanılabilecek kare sayısı / Frames that may reuse landmarks before a full detection
+    _MAX_REUSE = 10
+    
+    # Dirsek açısı üçlüleri: proksimal / eksen / distal / Elbow angle triplets: proximal / axis / distal
+    _TRIPLET_A = np.array([_LEFT_SHOULDER, _RIGHT_SHOULDER], dtype=np.int32)
+    _TRIPLET_B = np.array([_LEFT_ELBOW, _RIGHT_ELBOW], dtype=np.int32)
+    _TRIPLET_C = np.array([_LEFT_WRIST, _RIGHT_WRIST], dtype=np.int32)
+    
+    # Görünürlüğü kontrol edilen noktalar / Landmarks whose visibility is checked
+    _TRACKED = np.array([_NOSE, _LEFT_SHOULDER, _RIGHT_SHOULDER, _LEFT_ELBOW, _RIGHT_ELBOW,
+                         _LEFT_HIP, _RIGHT_HIP, _LEFT_KNEE, _RIGHT_KNEE], dtype=np.int32)
+    
+    # Seviye kontrolü çiftleri: omuzlar, kalçalar / Level check pairs: shoulders, hips
+    _LEVEL_LEFT = np.array([_LEFT_SHOULDER, _LEFT_HIP], dtype=np.int32)
+    _LEVEL_RIGHT = np.array([_RIGHT_SHOULDER, _RIGHT_HIP], dtype=np.int32)
+    
+    def __init__(self, model_complexity=None):
+        # GPU yoksa hafif model (0), varsa tam model (1) / Lite model (0) on CPU, full model (1) with a GPU
+        if model_complexity is None:
+            model_complexity = 1 if os.environ.get("MEDIAPIPE_GPU", "").lower() in {"1", "true", "yes"} else 0
+        
         self.pose = mp_pose.Pose(
             static_image_mode=False,
-            model_complexity=1,
+            model_complexity=model_complexity,
             enable_segmentation=False,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
+        
+        # Son landmark anahtarı ve metni / Last landmark key and feedback text
+        self._last_key = None
+        self._last_feedback = ""
+        
+        # Kareler arası landmark önbelleği / Inter-frame landmark cache
+        self._last_small = None
+        self._last_landmarks = None
+        self._frames_since_full = 0
+        
+        # Oturum içinde çakışan kareler için / For overlapping frames within a session
+        self.busy = threading.Lock()
     
-    def calculate_angle(self, a, b, c):
-        """Üç nokta arasındaki açıyı hesapla / Calculate angle between three points"""
-        try:
-            a = np.array(a)
-            b = np.array(b)
-            c = np.array(c)
+    def close(self):
+        """Pose'u kapat / Close Pose"""
+        self.pose.close()
+    
+    def _extract_landmarks(self, landmarks):
+        """Landmark'ları (33, 4) float32 diziye çevir / Convert landmarks to a (33, 4) float32 array
+        
+        Sütunlar / Columns: x, y, z, visibility
+        """
+        return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks], dtype=np.float32)
+    
+    def calculate_angles_batched(self, a, b, c):
+        """Birden çok üçlü için açıları tek seferde hesapla / Calculate angles for many triplets at once
+        
+        a, b, c: (N, 2) dizileri - her satır bir eklem üçlüsü / (N, 2) arrays - one joint triplet per row
+        """
+        # float32 tut, float64'e yükseltme / Keep float32, avoid silent float64 upcasts
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        c = np.asarray(c, dtype=np.float32)
+        
+        v1 = a - b
+        v2 = c - b
+        
+        # atan2(|v1 x v2|, v1 . v2) doğrudan [0, 180] verir / gives [0, 180] directly, stable near 0° and 180°
+        cross = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+        dot = np.einsum('ij,ij->i', v1, v2)
+        
+        return np.degrees(np.arctan2(np.abs(cross), dot))
+    
+    def analyze_landmarks(self, P):
+        """Landmark dizisinden geri bildirim üret / Build feedback from the landmark array"""
+        feedback = []
+        
+        # Görünürlük maskesi bir kez / Visibility mask computed once
+        vis = P[:, 3] > 0.5
+        
+        # İzlenen hiçbir nokta görünmüyorsa analizi atla / Skip the analysis when no tracked landmark is visible
+        if not vis[self._TRACKED].any():
+            return feedback
+        
+        # Omuz ve kalça seviye farkları tek işlemde (sol - sağ) / Shoulder and hip level differences in one op (left - right)
+        level_dy = P[self._LEVEL_LEFT, 1] - P[self._LEVEL_RIGHT, 1]
+        shoulder_dy, hip_dy = level_dy
+        shoulder_diff, hip_diff = np.abs(level_dy)
+        
+        # Görünür parçaları kontrol et / Check visible parts
+        visible_parts = []
+        
+        # Baş / Head
+        if vis[_NOSE]:
+            visible_parts.append("Baş/Head")
+        
+        # Omuzlar / Shoulders
+        if vis[_LEFT_SHOULDER] and vis[_RIGHT_SHOULDER]:
+            visible_parts.append("Omuzlar/Shoulders")
             
-            radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-            angle = np.abs(radians * 180.0 / np.pi)
+            # Omuz seviyesi kontrolü / Shoulder level check
+            if shoulder_diff > 0.05:
+                if shoulder_dy < 0:
+                    feedback.append("⚠️ Sol omuz daha yüksek / Left shoulder higher")
+                else:
+                    feedback.append("⚠️ Sağ omuz daha yüksek / Right shoulder higher")
+            else:
+                feedback.append("✅ Omuzlar seviyeli / Shoulders level")
+        
+        # Dirsekler / Elbows
+        if vis[_LEFT_ELBOW] and vis[_RIGHT_ELBOW]:
+            visible_parts.append("Dirsekler/Elbows")
+            
+            # Dirsek açıları tek çağrıda / Both elbow angles in one call
+            left_elbow_angle, right_elbow_angle = self.calculate_angles_batched(
+                P[self._TRIPLET_A, :2], P[self._TRIPLET_B, :2], P[self._TRIPLET_C, :2]
+            )
             
-            if angle > 180.0:
-                angle = 360 - angle
+            # Sol dirsek açısı / Left elbow angle
+            if left_elbow_angle > 0:
+                feedback.append(f"📐 Sol dirsek açısı / Left elbow: {left_elbow_angle:.1f}°")
                 
-            return angle
-        except:
-            return 0
+            # Sağ dirsek açısı / Right elbow angle
+            if right_elbow_angle > 0:
+                feedback.append(f"📐 Sağ dirsek açısı / Right elbow: {right_elbow_angle:.1f}°")
+        
+        # Kalçalar / Hips
+        if vis[_LEFT_HIP] and vis[_RIGHT_HIP]:
+            visible_parts.append("Kalçalar/Hips")
+            
+            # Kalça seviyesi / Hip level
+            if hip_diff > 0.03:
+                if hip_dy < 0:
+                    feedback.append("⚠️ Sol kalça daha yüksek / Left hip higher")
+                else:
+                    feedback.append("⚠️ Sağ kalça daha yüksek / Right hip higher")
+            else:
+                feedback.append("✅ Kalçalar seviyeli / Hips level")
+        
+        # Dizler / Knees
+        if vis[_LEFT_KNEE] and vis[_RIGHT_KNEE]:
+            visible_parts.append("Dizler/Knees")
+        
+        # Boyun pozisyonu / Neck position
+        if vis[_NOSE] and vis[_LEFT_SHOULDER] and vis[_RIGHT_SHOULDER]:
+            nose_x = P[_NOSE, 0]
+            shoulder_center_x = (P[_LEFT_SHOULDER, 0] + P[_RIGHT_SHOULDER, 0]) / 2
+            head_offset = abs(nose_x - shoulder_center_x)
+            
+            if head_offset > 0.08:
+                if nose_x < shoulder_center_x:
+                    feedback.append("🔍 Boyun: Sola eğik / Neck: Tilted left")
+                else:
+                    feedback.append("🔍 Boyun: Sağa eğik / Neck: Tilted right")
+            else:
+                feedback.append("🔍 Boyun: Merkezi / Neck: Centered")
+        
+        # Görünür parçaları başa ekle, insert kaydırması olmadan / Prepend visible parts without insert() shifts
+        if visible_parts:
+            header = f"✅ Görünen / Visible: {', '.join(visible_parts)}"
+            return [header, "", *feedback]  # Boş satır / Empty line
+        
+        return feedback
     
     def analyze_frame(self, frame):
         """Frame analiz et / Analyze frame"""
         if frame is None:
             return None, "❌ Kamera bağlantısı yok / No camera connection"
         
-        # BGR'den RGB'ye çevir / Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Pose tespiti / Pose detection
-        results = self.pose.process(rgb_frame)
-        
-        # Çizim için BGR'ye geri çevir / Convert back to BGR for drawing
-        output_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        # Neredeyse aynı karede son landmark'ları kullan / Reuse the last landmarks on a near-identical frame
+        small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY).astype(np.int16)
+        if (self._last_landmarks is not None
+                and self._frames_since_full < self._MAX_REUSE
+                and np.abs(small - self._last_small).mean() < self._STILL_DIFF):
+            self._frames_since_full += 1
+            pose_landmarks = self._last_landmarks
+        else:
+            pose_landmarks = self._detect(frame)
+            self._last_small = small
+            self._last_landmarks = pose_landmarks
+            self._frames_since_full = 0
         
-        feedback = []
+        # Landmark'lar normalize, tam çözünürlüklü orijinal üzerine çiz / Landmarks are normalized, draw on the full-res original
+        output_frame = frame
         
-        if results.pose_landmarks:
+        if pose_landmarks:
             # Landmark'ları çiz / Draw landmarks
             mp_drawing.draw_landmarks(
                 output_frame,
-                results.pose_landmarks,
+                pose_landmarks,
                 mp_pose.POSE_CONNECTIONS
             )
             
-            landmarks = results.pose_landmarks.landmark
+            # Landmark'ları tek diziye al / Extract landmarks into one array
+            P = self._extract_landmarks(pose_landmarks.landmark)
             
-            # Görünür parçaları kontrol et / Check visible parts
-            visible_parts = []
+            # Değişmeyen poz için önceki metni kullan / Reuse the previous text for an unchanged pose
+            key = (P * self._CACHE_SCALE).astype(np.int16).tobytes()
+            if key != self._last_key:
+                self._last_key = key
+                self._last_feedback = "\n".join(self.analyze_landmarks(P))
             
-            # Baş / Head
-            if landmarks[mp_pose.PoseLandmark.NOSE.value].visibility > 0.5:
-                visible_parts.append("Baş/Head")
-            
-            # Omuzlar / Shoulders
-            if (landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility > 0.5 and 
-                landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility > 0.5):
-                visible_parts.append("Omuzlar/Shoulders")
-                
-                # Omuz seviyesi kontrolü / Shoulder level check
-                left_shoulder_y = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y
-                right_shoulder_y = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y
-                shoulder_diff = abs(left_shoulder_y - right_shoulder_y)
-                
-                if shoulder_diff > 0.05:
-                    if left_shoulder_y < right_shoulder_y:
-                        feedback.append("⚠️ Sol omuz daha yüksek / Left shoulder higher")
-                    else:
-                        feedback.append("⚠️ Sağ omuz daha yüksek / Right shoulder higher")
-                else:
-                    feedback.append("✅ Omuzlar seviyeli / Shoulders level")
-            
-            # Dirsekler / Elbows
-            if (landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].visibility > 0.5 and 
-                landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].visibility > 0.5):
-                visible_parts.append("Dirsekler/Elbows")
-                
-                # Sol dirsek açısı / Left elbow angle
-                try:
-                    left_shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                                   landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-                    left_elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                                 landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-                    left_wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                                 landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-                    
-                    left_elbow_angle = self.calculate_angle(left_shoulder, left_elbow, left_wrist)
-                    if left_elbow_angle > 0:
-                        feedback.append(f"📐 Sol dirsek açısı / Left elbow: {left_elbow_angle:.1f}°")
-                        
-                    # Sağ dirsek açısı / Right elbow angle
-                    right_shoulder = [landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                                    landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-                    right_elbow = [landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                                  landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-                    right_wrist = [landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                                  landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-                    
-                    right_elbow_angle = self.calculate_angle(right_shoulder, right_elbow, right_wrist)
-                    if right_elbow_angle > 0:
-                        feedback.append(f"📐 Sağ dirsek açısı / Right elbow: {right_elbow_angle:.1f}°")
-                except:
-                    feedback.append("⚠️ Dirsek açısı hesaplanamadı / Cannot calculate elbow angles")
-            
-            # Kalçalar / Hips
-            if (landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].visibility > 0.5 and 
-                landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].visibility > 0.5):
-                visible_parts.append("Kalçalar/Hips")
-                
-                # Kalça seviyesi / Hip level
-                left_hip_y = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y
-                right_hip_y = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y
-                hip_diff = abs(left_hip_y - right_hip_y)
-                
-                if hip_diff > 0.03:
-                    if left_hip_y < right_hip_y:
-                        feedback.append("⚠️ Sol kalça daha yüksek / Left hip higher")
-                    else:
-                        feedback.append("⚠️ Sağ kalça daha yüksek / Right hip higher")
-                else:
-                    feedback.append("✅ Kalçalar seviyeli / Hips level")
-            
-            # Dizler / Knees
-            if (landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].visibility > 0.5 and 
-                landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].visibility > 0.5):
-                visible_parts.append("Dizler/Knees")
-            
-            # Boyun pozisyonu / Neck position
-            if (landmarks[mp_pose.PoseLandmark.NOSE.value].visibility > 0.5 and
-                landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility > 0.5 and
-                landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility > 0.5):
-                
-                nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-                left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-                right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-                
-                shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-                head_offset = abs(nose.x - shoulder_center_x)
-                
-                if head_offset > 0.08:
-                    if nose.x < shoulder_center_x:
-                        feedback.append("🔍 Boyun: Sola eğik / Neck: Tilted left")
-                    else:
-                        feedback.append("🔍 Boyun: Sağa eğik / Neck: Tilted right")
-                else:
-                    feedback.append("🔍 Boyun: Merkezi / Neck: Centered")
-            
-            # Görünür parçaları listele / List visible parts
-            if visible_parts:
-                feedback.insert(0, f"✅ Görünen / Visible: {', '.join(visible_parts)}")
-                feedback.insert(1, "")  # Boş satır / Empty line
-        else:
-            feedback.append("❌ Vücut tespit edilemedi / Body not detected")
-            feedback.append("📍 Kameraya tam vücut görünecek şekilde durun / Stand so full body is visible")
+            return output_frame, self._last_feedback
         
-        return output_frame, "\n".join(feedback)
+        return output_frame, self._NO_BODY_FEEDBACK
+    
+    def _detect(self, frame):
+        """Pose tespiti çalıştır / Run pose detection"""
+        # Çıkarım için büyük kareleri küçült / Downscale large frames for inference
+        small_frame = resize_for_inference(frame)
+        
+        # Gradio karesi zaten RGB, MediaPipe de RGB bekler / Gradio frames are already RGB, as MediaPipe expects
+        # Salt okunur işaretle, MediaPipe kopyalamasın / Mark read-only so MediaPipe skips its copy
+        # Küçültülmemiş kare çağıranın dizisidir; önceki bayrağı geri yüklenir
+        # An unscaled frame is the caller's array; its previous flag is restored
+        writeable = small_frame.flags.writeable
+        small_frame.flags.writeable = False
+        try:
+            # Pose tespiti / Pose detection
+            return self.pose.process(small_frame).pose_landmarks
+        finally:
+            small_frame.flags.writeable = writeable
+
+def process_frame(frame, session_analyzer=None):
+    """Frame işle / Process frame
+    
+    Her oturumun kendi analizcisi vardır; takip durumu ve hareketsiz kare önbelleği paylaşılmaz
+    Each session owns its analyzer; tracking state and the still-frame cache are never shared
+    """
+    if session_analyzer is None:
+        session_analyzer = BasicPostureAnalyzer()
+    
+    # Bu oturumda bir kare işlenirken gelen kare düşürülür, çıktı değişmez
+    # A frame arriving while this session is busy is dropped and the outputs stay as they are
+    if not session_analyzer.busy.acquire(blocking=False):
+        return gr.skip(), gr.skip(), session_analyzer
+    
+    try:
+        output_frame, feedback = session_analyzer.analyze_frame(frame)
+    finally:
+        session_analyzer.busy.release()
+    
+    return output_frame, feedback, session_analyzer
 
-# Global analyzer
-analyzer = BasicPostureAnalyzer()
+def _close_session_analyzer(session_analyzer):
+    """Oturum kapanınca analizciyi serbest bırak / Release the analyzer when the session ends"""
+    if session_analyzer is not None:
+        session_analyzer.close()
 
-def process_frame(frame):
-    """Frame işle / Process frame"""
-    return analyzer.analyze_frame(frame)
+# Oturum başına analizci, ilk karede kurulur / Per-session analyzer, built on the first frame
+session_analyzer = gr.State(None, delete_callback=_close_session_analyzer)
 
 # Gradio arayüzü / Gradio interface
 demo = gr.Interface(
     fn=process_frame,
-    inputs=gr.Image(sources=["webcam"], streaming=True),
+    inputs=[gr.Image(sources=["webcam"], streaming=True), session_analyzer],
     outputs=[
         gr.Image(streaming=True, label="🎯 Analysis"),
-        gr.Textbox(label="📊 Feedback", lines=10)
+        gr.Textbox(label="📊 Feedback", lines=10),
+        session_analyzer
     ],
     title="🎯 Basic Posture Analyzer",
     description="""
@@ -1,72 +1,166 @@
 # Gelişmiş Basit Postür Analiz Sistemi / Enhanced Simple Posture Analysis System
-import cv2
 import mediapipe as mp
 import gradio as gr
 import numpy as np
-import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from mediapipe_pool import PoseCache
+from frame_pipeline import inference_shape, resize_for_inference
 
 # MediaPipe başlatma / Initialize MediaPipe
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 
+# Landmark indeksleri, içe aktarmada bir kez çözülür / Landmark indices, resolved once at import
+_NOSE = mp_pose.PoseLandmark.NOSE.value
+_LEFT_SHOULDER = mp_pose.PoseLandmark.LEFT_SHOULDER.value
+_RIGHT_SHOULDER = mp_pose.PoseLandmark.RIGHT_SHOULDER.value
+_LEFT_ELBOW = mp_pose.PoseLandmark.LEFT_ELBOW.value
+_RIGHT_ELBOW = mp_pose.PoseLandmark.RIGHT_ELBOW.value
+_LEFT_HIP = mp_pose.PoseLandmark.LEFT_HIP.value
+_RIGHT_HIP = mp_pose.PoseLandmark.RIGHT_HIP.value
+_LEFT_KNEE = mp_pose.PoseLandmark.LEFT_KNEE.value
+_RIGHT_KNEE = mp_pose.PoseLandmark.RIGHT_KNEE.value
+_LEFT_ANKLE = mp_pose.PoseLandmark.LEFT_ANKLE.value
+_RIGHT_ANKLE = mp_pose.PoseLandmark.RIGHT_ANKLE.value
+
+# Çizim stili bir kez oluşturulur / Drawing style is built once
+_POSE_LM_STYLE = mp_drawing_styles.get_default_pose_landmarks_style()
+
+@lru_cache(maxsize=16)
+def _age_recommendations(age_bucket, issues):
+    """Yaş grubu ve sorunlara göre öneriler / Recommendations by age group and issues"""
+    recommendations = []
+    
+    if age_bucket == 0:
+        recommendations.append("💡 Genç yaş: Postür alışkanlıkları şimdi oluşturun / Young age: Form posture habits now")
+        if "forward_head" in issues:
+            recommendations.append("📱 Telefon/bilgisayar kullanımını sınırlayın / Limit phone/computer use")
+    elif age_bucket == 1:
+        recommendations.append("💡 Orta yaş: Düzenli egzersiz önemli / Middle age: Regular exercise important")
+        if "shoulder_imbalance" in issues:
+            recommendations.append("💼 Çalışma ortamınızı ergonomik yapın / Make workspace ergonomic")
+    else:
+        recommendations.append("💡 Olgun yaş: Kemik sağlığına dikkat / Mature age: Focus on bone health")
+        if "hip_imbalance" in issues:
+            recommendations.append("🚶 Günlük yürüyüş yapın / Take daily walks")
+    
+    return tuple(recommendations)
+
 class EnhancedPostureAnalyzer:
     """Gelişmiş basit postür analiz sınıfı / Enhanced simple posture analyzer class"""
     
-    def __init__(self):
-        self.pose = mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    # Önbellek anahtarı için nicemleme ölçeği / Quantization scale for the feedback cache key
+    _CACHE_SCALE = 1024
     
-    def calculate_angle(self, a, b, c):
-        """Üç nokta arasındaki açıyı hesapla / Calculate angle between three points"""
-        try:
-            a = np.array(a)
-            b = np.array(b)
-            c = np.array(c)
-            
-            radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-            angle = np.abs(radians * 180.0 / np.pi)
-            
-            if angle > 180.0:
-                angle = 360 - angle
-                
-            return angle
-        except:
-            return 0
+    def __init__(self, model_complexity=0):
+        # Bu analizciye ait, karmaşıklık başına bir Pose; geçişte yeniden kurulmaz
+        # One Pose per complexity owned by this analyzer; not rebuilt on switch
+        self._poses = PoseCache()
+        self.model_complexity = model_complexity
+        self.pose = self._poses.get(model_complexity)
+        
+        # Kare atlama: tespit her K karede bir çalışır / Frame skipping: detection runs every K frames
+        self.detect_every = 2
+        self.frame_idx = 0
+        self.last_pose_landmarks = None
+        self.last_lm = None
+        
+        # Çıkarım arka planda, analiz ve çizimle örtüşür / Inference runs in the background, overlapping analysis and drawing
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+        
+        # Çıkarım girişi için sabit tampon / Fixed buffer for the inference input
+        self._scratch = None
+        
+        # Son anahtar ve metin / Last key and feedback text
+        self._last_key = None
+        self._last_feedback = ""
+        
+        # Bu analizcide aynı anda tek kare işlenir / One frame at a time per analyzer
+        self.busy = threading.Lock()
+    
+    def close(self):
+        """Bekleyen işi bitir, iş parçacığını ve Pose'u kapat / Finish the pending job, close the thread and Pose"""
+        self.pool.shutdown(wait=True)
+        self.pending = None
+        self._poses.close()
+    
+    def calculate_angles_batch(self, a, b, c):
+        """Eklem üçlüleri için açıları tek seferde hesapla / Calculate angles for joint triplets in one pass
+        
+        a, b, c: (N, 2) dizileri, b tepe noktası / (N, 2) arrays, b is the vertex
+        """
+        v1 = a - b
+        v2 = c - b
+        radians = np.arctan2(v2[:, 1], v2[:, 0]) - np.arctan2(v1[:, 1], v1[:, 0])
+        angles = np.abs(np.degrees(radians))
+        return np.where(angles > 180.0, 360.0 - angles, angles)
     
     def get_age_specific_recommendations(self, age, issues):
         """Yaşa özel öneriler / Age-specific recommendations"""
-        recommendations = []
-        
-        if age < 25:
-            recommendations.append("💡 Genç yaş: Postür alışkanlıkları şimdi oluşturun / Young age: Form posture habits now")
-            if "forward_head" in issues:
-                recommendations.append("📱 Telefon/bilgisayar kullanımını sınırlayın / Limit phone/computer use")
-        elif age < 45:
-            recommendations.append("💡 Orta yaş: Düzenli egzersiz önemli / Middle age: Regular exercise important")
-            if "shoulder_imbalance" in issues:
-                recommendations.append("💼 Çalışma ortamınızı ergonomik yapın / Make workspace ergonomic")
-        else:
-            recommendations.append("💡 Olgun yaş: Kemik sağlığına dikkat / Mature age: Focus on bone health")
-            if "hip_imbalance" in issues:
-                recommendations.append("🚶 Günlük yürüyüş yapın / Take daily walks")
-        
-        return recommendations
+        # Yaş yalnızca üç dala ayrılır / Age only selects one of three branches
+        age_bucket = 0 if age < 25 else (1 if age < 45 else 2)
+        return _age_recommendations(age_bucket, frozenset(issues))
     
-    def analyze_frame_with_profile(self, frame, age=None, height=None, weight=None):
+    def analyze_frame_with_profile(self, frame, age=None, height=None, weight=None, model_complexity=None):
         """Profil bilgileriyle frame analiz et / Analyze frame with profile information"""
         if frame is None:
             return None, "❌ Kamera bağlantısı yok / No camera connection"
         
+        # Model değiştiyse eski landmark'ları bırak / Drop stale landmarks when the model changes
+        if model_complexity is not None and model_complexity != self.model_complexity:
+            self.model_complexity = model_complexity
+            self.pose = self._poses.get(model_complexity)
+            self.last_pose_landmarks = None
+            # Tampon serbest kalsın diye eski işi bekle / Wait for the old job so the buffer is free
+            if self.pending is not None:
+                self.pending.result()
+                self.pending = None
+        
         # Temel analiz / Basic analysis
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_frame)
-        output_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        # Gradio karesi zaten RGB / Gradio frames are already RGB
+        # Ara karelerde son landmark'lar yeniden kullanılır / In-between frames reuse the last landmarks
+        if self.last_pose_landmarks is None or self.frame_idx % self.detect_every == 0:
+            # Önceki karenin sonucunu al, bu kareyi gönder (bir kare gecikme)
+            # Collect the previous frame's result, submit this one (one-frame latency)
+            if self.pending is not None:
+                self.last_pose_landmarks = self.pending.result().pose_landmarks
+                self.last_lm = None
+            # Çıkarımdan önce küçült; landmark'lar normalize olduğundan tam kareye çizilir
+            # Downscale before inference; landmarks are normalized so they are drawn on the full frame
+            # Önceki iş bittiği için tampon yeniden kullanılabilir / The buffer is reusable since the previous job is done
+            shape = inference_shape(frame)
+            if self._scratch is None or self._scratch.shape != shape:
+                self._scratch = np.empty(shape, dtype=frame.dtype)
+            # Kare yerinde çizildiği için kopyası gönderilir / A copy is submitted since the frame is drawn in place
+            resize_for_inference(frame, self._scratch)
+            self.pending = self.pool.submit(self.pose.process, self._scratch)
+        self.frame_idx += 1
+        pose_landmarks = self.last_pose_landmarks
+        output_frame = frame
+        
+        lm = None
+        if pose_landmarks:
+            # Landmark'ları çiz / Draw landmarks
+            mp_drawing.draw_landmarks(
+                output_frame,
+                pose_landmarks,
+                mp_pose.POSE_CONNECTIONS,
+                landmark_drawing_spec=_POSE_LM_STYLE
+            )
+            
+            # Landmark'ları tek (33, 4) diziye al / Extract landmarks into one (33, 4) array
+            if self.last_lm is None:
+                self.last_lm = self.extract_landmarks(pose_landmarks.landmark)
+            lm = self.last_lm
+        
+        # Poz ve profil değişmediyse önceki metni kullan / Reuse the previous text when pose and profile are unchanged
+        key = (age, height, weight, None if lm is None else (lm * self._CACHE_SCALE).astype(np.int16).tobytes())
+        if key == self._last_key:
+            return output_frame, self._last_feedback
         
         feedback = []
         detected_issues = []
@@ -93,19 +187,9 @@ class EnhancedPostureAnalyzer:
             feedback.append(f"👤 Profil / Profile: {' | '.join(profile_info)}")
             feedback.append("")
         
-        if results.pose_landmarks:
-            # Landmark'ları çiz / Draw landmarks
-            mp_drawing.draw_landmarks(
-                output_frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style()
-            )
-            
-            landmarks = results.pose_landmarks.landmark
-            
+        if lm is not None:
             # Detaylı analiz / Detailed analysis
-            feedback.extend(self.detailed_body_analysis(landmarks, detected_issues))
+            feedback.extend(self.detailed_body_analysis(lm, detected_issues))
             
             # Yaşa özel öneriler / Age-specific recommendations
             if age:
@@ -117,42 +201,53 @@ class EnhancedPostureAnalyzer:
         else:
             feedback.append("❌ Vücut tespit edilemedi / Body not detected")
         
-        return output_frame, "\n".join(feedback)
+        self._last_key = key
+        self._last_feedback = "\n".join(feedback)
+        return output_frame, self._last_feedback
     
-    def detailed_body_analysis(self, landmarks, detected_issues):
+    def extract_landmarks(self, landmarks):
+        """Landmark'ları (33, 4) float32 diziye çevir / Convert landmarks to a (33, 4) float32 array
+        
+        Sütunlar / Columns: x, y, z, visibility
+        """
+        return np.fromiter(
+            (v for p in landmarks for v in (p.x, p.y, p.z, p.visibility)),
+            dtype=np.float32,
+            count=len(landmarks) * 4
+        ).reshape(-1, 4)
+    
+    def detailed_body_analysis(self, lm, detected_issues):
         """Detaylı vücut analizi / Detailed body analysis"""
         feedback = []
         
         try:
             # Görünür parçalar / Visible parts
-            visible_parts = self.check_visibility(landmarks)
+            visible_parts = self.check_visibility(lm)
             feedback.append(f"✅ Görünen: {', '.join(visible_parts)} / Visible: {', '.join(visible_parts)}")
             feedback.append("")
             
+            # Her analiz (satırlar, sorun etiketleri) döndürür / Each analysis returns (lines, issue flags)
             # Baş ve boyun analizi / Head and neck analysis
-            head_analysis = self.analyze_head_neck(landmarks)
+            head_analysis, head_issues = self.analyze_head_neck(lm)
             feedback.extend(head_analysis)
-            if "forward_head" in head_analysis[0]:
-                detected_issues.append("forward_head")
+            detected_issues.extend(head_issues)
             
             # Omuz analizi / Shoulder analysis
-            shoulder_analysis = self.analyze_shoulders(landmarks)
+            shoulder_analysis, shoulder_issues = self.analyze_shoulders(lm)
             feedback.extend(shoulder_analysis)
-            if "imbalance" in str(shoulder_analysis):
-                detected_issues.append("shoulder_imbalance")
+            detected_issues.extend(shoulder_issues)
             
             # Gövde analizi / Torso analysis
-            torso_analysis = self.analyze_torso(landmarks)
+            torso_analysis, _ = self.analyze_torso(lm)
             feedback.extend(torso_analysis)
             
             # Kalça analizi / Hip analysis
-            hip_analysis = self.analyze_hips(landmarks)
+            hip_analysis, hip_issues = self.analyze_hips(lm)
             feedback.extend(hip_analysis)
-            if "imbalance" in str(hip_analysis):
-                detected_issues.append("hip_imbalance")
+            detected_issues.extend(hip_issues)
             
             # Bacak analizi / Leg analysis
-            leg_analysis = self.analyze_legs(landmarks)
+            leg_analysis, _ = self.analyze_legs(lm)
             feedback.extend(leg_analysis)
             
         except Exception as e:
@@ -160,54 +255,49 @@ class EnhancedPostureAnalyzer:
         
         return feedback
     
-    def check_visibility(self, landmarks):
+    def check_visibility(self, lm):
         """Görünürlük kontrolü / Visibility check"""
         parts = []
+        vis = lm[:, 3] > 0.5
         
         # Baş / Head
-        if landmarks[mp_pose.PoseLandmark.NOSE.value].visibility > 0.5:
+        if vis[_NOSE]:
             parts.append("Baş/Head")
         
         # Omuzlar / Shoulders
-        if (landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility > 0.5 and 
-            landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility > 0.5):
+        if vis[_LEFT_SHOULDER] and vis[_RIGHT_SHOULDER]:
             parts.append("Omuzlar/Shoulders")
         
         # Dirsekler / Elbows
-        if (landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].visibility > 0.5 and 
-            landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].visibility > 0.5):
+        if vis[_LEFT_ELBOW] and vis[_RIGHT_ELBOW]:
             parts.append("Dirsekler/Elbows")
         
         # Kalçalar / Hips
-        if (landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].visibility > 0.5 and 
-            landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].visibility > 0.5):
+        if vis[_LEFT_HIP] and vis[_RIGHT_HIP]:
             parts.append("Kalçalar/Hips")
         
         # Dizler / Knees
-        if (landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].visibility > 0.5 and 
-            landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].visibility > 0.5):
+        if vis[_LEFT_KNEE] and vis[_RIGHT_KNEE]:
             parts.append("Dizler/Knees")
         
         return parts
     
-    def analyze_head_neck(self, landmarks):
+    def analyze_head_neck(self, lm):
         """Baş ve boyun analizi / Head and neck analysis"""
         feedback = []
+        issues = set()
         
-        nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-        left_ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR.value]
-        right_ear = landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value]
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        nose_x, nose_y = lm[_NOSE, :2]
+        left_shoulder = lm[_LEFT_SHOULDER]
+        right_shoulder = lm[_RIGHT_SHOULDER]
         
         # Baş eğimi / Head tilt
-        ear_center_x = (left_ear.x + right_ear.x) / 2
-        shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
+        shoulder_center_x = (left_shoulder[0] + right_shoulder[0]) / 2
         
-        head_offset = abs(nose.x - shoulder_center_x)
+        head_offset = abs(nose_x - shoulder_center_x)
         
         if head_offset > 0.08:
-            if nose.x < shoulder_center_x:
+            if nose_x < shoulder_center_x:
                 feedback.append("🔍 Boyun: Sola eğik / Neck: Tilted left")
             else:
                 feedback.append("🔍 Boyun: Sağa eğik / Neck: Tilted right")
@@ -215,126 +305,145 @@ class EnhancedPostureAnalyzer:
             feedback.append("🔍 Boyun: Merkezi pozisyon / Neck: Centered")
         
         # İleri baş pozisyonu / Forward head posture
-        shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
-        if nose.y > shoulder_center_y - 0.08:
+        shoulder_center_y = (left_shoulder[1] + right_shoulder[1]) / 2
+        if nose_y > shoulder_center_y - 0.08:
             feedback.append("⚠️ İleri baş pozisyonu tespit edildi / Forward head posture detected")
+            issues.add("forward_head")
         
-        return feedback
+        return feedback, issues
     
-    def analyze_shoulders(self, landmarks):
+    def analyze_shoulders(self, lm):
         """Omuz analizi / Shoulder analysis"""
         feedback = []
+        issues = set()
         
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        left_shoulder_y = lm[_LEFT_SHOULDER, 1]
+        right_shoulder_y = lm[_RIGHT_SHOULDER, 1]
         
         # Omuz seviyesi / Shoulder level
-        height_diff = abs(left_shoulder.y - right_shoulder.y)
+        height_diff = abs(left_shoulder_y - right_shoulder_y)
         
         if height_diff > 0.04:
-            if left_shoulder.y < right_shoulder.y:
+            issues.add("shoulder_imbalance")
+            if left_shoulder_y < right_shoulder_y:
                 feedback.append("🔍 Omuzlar: Sol omuz yüksek / Shoulders: Left shoulder high")
             else:
                 feedback.append("🔍 Omuzlar: Sağ omuz yüksek / Shoulders: Right shoulder high")
         else:
             feedback.append("🔍 Omuzlar: Seviyeli / Shoulders: Level")
         
-        return feedback
+        return feedback, issues
     
-    def analyze_torso(self, landmarks):
+    def analyze_torso(self, lm):
         """Gövde analizi / Torso analysis"""
         feedback = []
         
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        
         # Gövde eğimi / Torso tilt
-        shoulder_center = ((left_shoulder.x + right_shoulder.x) / 2, (left_shoulder.y + right_shoulder.y) / 2)
-        hip_center = ((left_hip.x + right_hip.x) / 2, (left_hip.y + right_hip.y) / 2)
+        shoulder_center_x = (lm[_LEFT_SHOULDER, 0] + lm[_RIGHT_SHOULDER, 0]) / 2
+        hip_center_x = (lm[_LEFT_HIP, 0] + lm[_RIGHT_HIP, 0]) / 2
         
-        torso_tilt = abs(shoulder_center[0] - hip_center[0])
+        torso_tilt = abs(shoulder_center_x - hip_center_x)
         
         if torso_tilt > 0.05:
-            if shoulder_center[0] < hip_center[0]:
+            if shoulder_center_x < hip_center_x:
                 feedback.append("🔍 Gövde: Sola eğik / Torso: Leaning left")
             else:
                 feedback.append("🔍 Gövde: Sağa eğik / Torso: Leaning right")
         else:
             feedback.append("🔍 Gövde: Dik duruş / Torso: Upright")
         
-        return feedback
+        return feedback, set()
     
-    def analyze_hips(self, landmarks):
+    def analyze_hips(self, lm):
         """Kalça analizi / Hip analysis"""
         feedback = []
+        issues = set()
         
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
+        left_hip_y = lm[_LEFT_HIP, 1]
+        right_hip_y = lm[_RIGHT_HIP, 1]
         
         # Kalça seviyesi / Hip level
-        height_diff = abs(left_hip.y - right_hip.y)
+        height_diff = abs(left_hip_y - right_hip_y)
         
         if height_diff > 0.03:
-            if left_hip.y < right_hip.y:
+            issues.add("hip_imbalance")
+            if left_hip_y < right_hip_y:
                 feedback.append("🔍 Kalçalar: Sol kalça yüksek / Hips: Left hip high")
             else:
                 feedback.append("🔍 Kalçalar: Sağ kalça yüksek / Hips: Right hip high")
         else:
             feedback.append("🔍 Kalçalar: Seviyeli / Hips: Level")
         
-        return feedback
+        return feedback, issues
     
-    def analyze_legs(self, landmarks):
+    def analyze_legs(self, lm):
         """Bacak analizi / Leg analysis"""
         feedback = []
         
-        try:
-            # Diz açıları / Knee angles
-            left_hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x, landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-            left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x, landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
-            left_ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x, landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
-            
-            left_knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
-            
-            if left_knee_angle > 0:
-                feedback.append(f"🔍 Sol diz açısı / Left knee angle: {left_knee_angle:.1f}°")
-                if left_knee_angle < 160:
-                    feedback.append("   ⚠️ Sol diz bükümlü / Left knee bent")
-            
-            # Sağ diz / Right knee
-            right_hip = [landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x, landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y]
-            right_knee = [landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].x, landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y]
-            right_ankle = [landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x, landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
-            
-            right_knee_angle = self.calculate_angle(right_hip, right_knee, right_ankle)
-            
-            if right_knee_angle > 0:
-                feedback.append(f"🔍 Sağ diz açısı / Right knee angle: {right_knee_angle:.1f}°")
-                if right_knee_angle < 160:
-                    feedback.append("   ⚠️ Sağ diz bükümlü / Right knee bent")
+        # Diz açıları, sol ve sağ tek çağrıda / Knee angles, left and right in one call
+        hips = lm[[_LEFT_HIP, _RIGHT_HIP], :2]
+        knees = lm[[_LEFT_KNEE, _RIGHT_KNEE], :2]
+        ankles = lm[[_LEFT_ANKLE, _RIGHT_ANKLE], :2]
         
-        except:
-            feedback.append("⚠️ Bacak analizi yapılamadı / Leg analysis failed")
+        left_knee_angle, right_knee_angle = self.calculate_angles_batch(hips, knees, ankles)
         
-        return feedback
-
-# Global analyzer
-analyzer = EnhancedPostureAnalyzer()
+        # Yalnızca kalça, diz ve ayak bileği görünürse raporla / Report only when hip, knee and ankle are visible
+        vis = lm[:, 3] > 0.5
+        left_visible = vis[_LEFT_HIP] and vis[_LEFT_KNEE] and vis[_LEFT_ANKLE]
+        right_visible = vis[_RIGHT_HIP] and vis[_RIGHT_KNEE] and vis[_RIGHT_ANKLE]
+        
+        if left_visible and left_knee_angle > 0:
+            feedback.append(f"🔍 Sol diz açısı / Left knee angle: {left_knee_angle:.1f}°")
+            if left_knee_angle < 160:
+                feedback.append("   ⚠️ Sol diz bükümlü / Left knee bent")
+        
+        # Sağ diz / Right knee
+        if right_visible and right_knee_angle > 0:
+            feedback.append(f"🔍 Sağ diz açısı / Right knee angle: {right_knee_angle:.1f}°")
+            if right_knee_angle < 160:
+                feedback.append("   ⚠️ Sağ diz bükümlü / Right knee bent")
+        
+        return feedback, set()
 
-def process_with_profile(frame, age, height, weight):
-    """Profil bilgileriyle işle / Process with profile"""
-    # Boş değerleri None'a çevir / Convert empty values to None
-    age = int(age) if age and str(age).strip() else None
-    height = int(height) if height and str(height).strip() else None
-    weight = int(weight) if weight and str(weight).strip() else None
+def process_with_profile(frame, age, height, weight, model_complexity=0, session_analyzer=None):
+    """Profil bilgileriyle işle / Process with profile
+    
+    Her oturumun kendi analizcisi vardır; kareler, landmark'lar ve metin oturumlar arasında paylaşılmaz
+    Each session owns its analyzer; frames, landmarks and text are never shared between sessions
+    """
+    if session_analyzer is None:
+        session_analyzer = EnhancedPostureAnalyzer()
+    
+    # Bu oturumda bir kare işlenirken gelen kare düşürülür, çıktı değişmez
+    # A frame arriving while this session is busy is dropped and the outputs stay as they are
+    if not session_analyzer.busy.acquire(blocking=False):
+        return gr.skip(), gr.skip(), session_analyzer
     
-    return analyzer.analyze_frame_with_profile(frame, age, height, weight)
+    try:
+        # gr.Number float ya da None verir / gr.Number delivers a float or None
+        age = int(age) if age is not None else None
+        height = int(height) if height is not None else None
+        weight = int(weight) if weight is not None else None
+        
+        output_frame, feedback = session_analyzer.analyze_frame_with_profile(
+            frame, age, height, weight, int(model_complexity)
+        )
+    finally:
+        session_analyzer.busy.release()
+    
+    return output_frame, feedback, session_analyzer
+
+def _close_session_analyzer(session_analyzer):
+    """Oturum kapanınca analizciyi serbest bırak / Release the analyzer when the session ends"""
+    if session_analyzer is not None:
+        session_analyzer.close()
 
 # Basit Gradio arayüzü / Simple Gradio interface
 def create_interface():
     with gr.Blocks(title="Enhanced Posture Analyzer") as demo:
+        # Oturum başına analizci, ilk karede kurulur / Per-session analyzer, built on the first frame
+        session_analyzer = gr.State(None, delete_callback=_close_session_analyzer)
+        
         gr.Markdown("""
         # 🎯 Enhanced Posture Analyzer
         ## Real-time posture analysis with optional profile information
@@ -370,6 +479,14 @@ def create_interface():
                     maximum=200
                 )
 
+                complexity_input = gr.Slider(
+                    minimum=0,
+                    maximum=2,
+                    step=1,
+                    value=0,
+                    label="Model complexity / Model karmaşıklığı (0 = Lite, 2 = Heavy)"
+                )
+
                 input_video = gr.Image(
                     sources=["webcam"],
                     streaming=True,
@@ -391,9 +508,10 @@ def create_interface():
         # Canlı işleme / Live processing
         input_video.stream(
             fn=process_with_profile,
-            inputs=[input_video, age_input, height_input, weight_input],
-            outputs=[output_video, feedback_text],
-            stream_every=0.1
+            inputs=[input_video, age_input, height_input, weight_input, complexity_input, session_analyzer],
+            outputs=[output_video, feedback_text, session_analyzer],
+            stream_every=0.04,
+            concurrency_limit=2
         )
 
     return demo
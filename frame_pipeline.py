@@ -0,0 +1,147 @@
+# Kare işleme hattı yardımcıları / Frame pipeline helpers
+import logging
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+_log = logging.getLogger(__name__)
+
+# Çıkarım karesinin kısa kenarı (piksel) / Short side of the inference frame (pixels)
+INFERENCE_SHORT_SIDE = 480
+
+def inference_shape(frame, short_side=INFERENCE_SHORT_SIDE):
+    """
+    Çıkarım karesinin şekli, kısa kenar en fazla short_side / Shape of the inference frame, short side at most short_side
+    
+    Args:
+        frame: Kaynak kare / Source frame
+        short_side: Kısa kenar üst sınırı (piksel) / Short-side cap (pixels)
+    
+    Returns:
+        shape: (yükseklik, genişlik, ...) / (height, width, ...)
+    """
+    h, w = frame.shape[:2]
+    scale = min(short_side / min(h, w), 1.0)
+    return (round(h * scale), round(w * scale)) + frame.shape[2:]
+
+def resize_for_inference(frame, dst=None, short_side=INFERENCE_SHORT_SIDE):
+    """
+    Kareyi çıkarım için küçült / Downscale a frame for inference
+    
+    Landmark'lar normalize olduğundan sonuçlar tam kareye çizilebilir
+    Landmarks are normalized, so the results can be drawn on the full frame
+    
+    Args:
+        frame: Kaynak kare / Source frame
+        dst: İsteğe bağlı hedef tampon, inference_shape biçiminde / Optional destination buffer shaped like inference_shape
+        short_side: Kısa kenar üst sınırı (piksel) / Short-side cap (pixels)
+    
+    Returns:
+        small: Küçük kare; dst yoksa ve küçültme gerekmiyorsa frame'in kendisi
+               Small frame; the frame itself when there is no dst and no scaling is needed
+    """
+    shape = inference_shape(frame, short_side) if dst is None else dst.shape
+    if shape[:2] == frame.shape[:2]:
+        if dst is None:
+            return frame
+        np.copyto(dst, frame)
+        return dst
+    return cv2.resize(frame, (shape[1], shape[0]), dst=dst, interpolation=cv2.INTER_AREA)
+
+class FramePool:
+    """Kareler arasında yeniden kullanılan tamponlar / Buffers reused across frames"""
+    
+    def __init__(self):
+        self._free = queue.SimpleQueue()  # Yeniden kullanılacak tamponlar / Buffers ready for reuse
+    
+    def get(self, shape, dtype):
+        """Boştaki bir tamponu al, yoksa ayır / Take a free buffer, allocate one if none fits"""
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            buf = None
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+        return buf
+    
+    def release(self, buf):
+        """Tamponu havuza geri ver / Return a buffer to the pool"""
+        self._free.put(buf)
+
+class LatestFrameWorker:
+    """
+    Tek yuvalı posta kutusuyla çıkarım iş parçacığı / Inference thread with a single-slot mailbox
+
+    En yeni kare kazanır: bekleyen eski kare, yenisi gelince atılır. Sonuç bir kare gecikmeli okunur.
+    The newest frame wins: a waiting stale frame is dropped when a new one arrives. Results are read one frame late.
+
+    Args:
+        process: Kareyi işleyip sonucu döndüren fonksiyon / Function that processes a frame and returns the result
+        release: İşlenen ya da atılan her kareyle çağrılır (tampon havuzu için) / Called with every processed or dropped frame (for buffer pools)
+    """
+
+    def __init__(self, process, release=None):
+        self._process = process
+        self._release = release
+        self._inbox = queue.Queue(maxsize=1)  # Yalnızca en yeni kare bekler / Only the newest frame waits
+        self.latest = None                    # Son çıkarım sonucu / Latest inference result
+        self.error = None                     # Son çıkarım hatası / Last inference error
+        self._first_result = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Kuyruktaki en yeni kareyi işle / Process the newest queued frame"""
+        while True:
+            frame = self._inbox.get()
+            if frame is None:
+                break
+
+            # Hata iş parçacığını öldürmez, çağırana bildirilir / An error does not kill the thread, it is reported to the caller
+            try:
+                self.latest = self._process(frame)
+                self.error = None
+            except Exception as e:
+                _log.exception("Çıkarım başarısız / Inference failed")
+                self.latest = None
+                self.error = e
+            finally:
+                if self._release is not None:
+                    self._release(frame)
+                self._first_result.set()
+
+    def submit(self, frame):
+        """Eski kareyi at, yenisini kuyruğa koy / Drop the stale frame, queue the new one"""
+        try:
+            stale = self._inbox.get_nowait()
+            if stale is not None and self._release is not None:
+                self._release(stale)
+        except queue.Empty:
+            pass
+        try:
+            self._inbox.put_nowait(frame)
+        except queue.Full:
+            if frame is not None and self._release is not None:
+                self._release(frame)
+
+    def wait_first(self, timeout=None):
+        """
+        İlk çıkarım bitene kadar bekle / Wait until the first inference has finished
+
+        Returns:
+            done: Zamanında bitti mi / Whether it finished in time
+        """
+        return self._first_result.wait(timeout)
+
+    def close(self, timeout=1.0):
+        """
+        İş parçacığını durdur / Stop the thread
+
+        Returns:
+            stopped: İş parçacığı durdu mu / Whether the thread has stopped
+        """
+        self.submit(None)
+        self._thread.join(timeout=timeout)
+        return not self._thread.is_alive()
@@ -1,14 +1,30 @@
 # Gerekli kütüphaneleri içe aktar / Import necessary libraries
-import cv2
 import mediapipe as mp
 import gradio as gr
-import numpy as np
+import threading
+from mediapipe_pool import HANDS_LOCK, HandsCache, get_hands
+from frame_pipeline import resize_for_inference
 
 # MediaPipe el takip modüllerini başlat / Initialize MediaPipe hand tracking modules
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 
+# Çizim stilleri bir kez oluşturulur / Drawing styles are built once
+_HAND_LM_STYLE = mp_drawing_styles.get_default_hand_landmarks_style()
+_HAND_CONN_STYLE = mp_drawing_styles.get_default_hand_connections_style()
+
+# Açık parmak sayısına göre jest adları / Gesture names by extended finger count
+_GESTURES = {
+    0: "✊ Yumruk / Fist",
+    1: "☝️ Bir parmak / One finger",
+    2: "✌️ İki parmak / Two fingers",
+    5: "✋ Açık el / Open hand"
+}
+
+# El yokken sabit metin / Fixed text when no hand is detected
+_NO_HANDS_FEEDBACK = "El tespit edilemedi. Elinizi kameraya gösterin. / No hands detected. Show your hand to the camera."
+
 def process_frame(frame):
     """
     Tek bir frame'i el tespiti için işler / Process a single frame for hand detection
@@ -19,36 +35,27 @@ def process_frame(frame):
     Returns:
         annotated_frame: El landmark'ları çizilmiş görüntü / Image with hand landmarks drawn
     """
-    # El tespit edici başlat / Initialize hands detector
-    with mp_hands.Hands(
-        static_image_mode=False,      # Video akışı için False / False for video stream
-        max_num_hands=2,              # Maksimum 2 el tespit et / Detect maximum 2 hands
-        min_detection_confidence=0.5, # Minimum tespit güven skoru / Minimum detection confidence
-        min_tracking_confidence=0.5   # Minimum takip güven skoru / Minimum tracking confidence
-    ) as hands:
-        
-        # BGR'den RGB'ye dönüştür (MediaPipe RGB kullanır) / Convert BGR to RGB (MediaPipe uses RGB)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Frame'i işle ve el landmark'larını tespit et / Process frame and detect hand landmarks
-        results = hands.process(rgb_frame)
-        
-        # Görüntüleme için tekrar BGR'ye dönüştür / Convert back to BGR for display
-        annotated_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-        
-        # El landmark'larını çiz / Draw hand landmarks
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # El landmark'larını ve bağlantılarını çiz / Draw hand landmarks and connections
-                mp_drawing.draw_landmarks(
-                    annotated_frame,
-                    hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing_styles.get_default_hand_landmarks_style(),
-                    mp_drawing_styles.get_default_hand_connections_style()
-                )
-        
-        return annotated_frame
+    # Gradio karesi zaten RGB, MediaPipe de RGB bekler / Gradio frames are already RGB, as MediaPipe expects
+    # Frame'i işle ve el landmark'larını tespit et / Process frame and detect hand landmarks
+    with HANDS_LOCK:
+        results = get_hands().process(frame)
+    
+    # Landmark'lar doğrudan giriş karesine çizilir / Landmarks are drawn straight onto the input frame
+    annotated_frame = frame
+    
+    # El landmark'larını çiz / Draw hand landmarks
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            # El landmark'larını ve bağlantılarını çiz / Draw hand landmarks and connections
+            mp_drawing.draw_landmarks(
+                annotated_frame,
+                hand_landmarks,
+                mp_hands.HAND_CONNECTIONS,
+                _HAND_LM_STYLE,
+                _HAND_CONN_STYLE
+            )
+    
+    return annotated_frame
 
 def analyze_hand_gestures(landmarks):
     """
@@ -117,72 +124,95 @@ def analyze_hand_gestures(landmarks):
         feedback.extend(finger_status)
         
         # Basit jest tanıma / Simple gesture recognition
-        if extended_fingers == 0:
-            feedback.append("✊ Yumruk / Fist")
-        elif extended_fingers == 1:
-            feedback.append("☝️ Bir parmak / One finger")
-        elif extended_fingers == 2:
-            feedback.append("✌️ İki parmak / Two fingers")
-        elif extended_fingers == 5:
-            feedback.append("✋ Açık el / Open hand")
-        else:
-            feedback.append(f"🤚 {extended_fingers} parmak açık / {extended_fingers} fingers extended")
+        feedback.append(_GESTURES.get(
+            extended_fingers,
+            f"🤚 {extended_fingers} parmak açık / {extended_fingers} fingers extended"
+        ))
             
     except Exception as e:
         feedback.append(f"Analiz hatası / Analysis error: {str(e)}")
     
     return "\n".join(feedback)
 
-def webcam_interface(frame, confidence_threshold):
+class _HandsSession:
+    """Bir Gradio oturumunun el takip grafikleri / Hand tracking graphs of one Gradio session"""
+    
+    def __init__(self):
+        self.hands = HandsCache()  # Takip durumu oturumlar arasında paylaşılmaz / Tracking state is never shared between sessions
+        self.busy = threading.Lock()
+    
+    def close(self):
+        """Hands grafiklerini kapat / Close the Hands graphs"""
+        self.hands.close()
+
+def webcam_interface(frame, confidence_threshold, session=None):
     """
     Gradio webcam girişi için arayüz fonksiyonu / Interface function for Gradio webcam input
     
     Args:
         frame: Webcam'den gelen frame / Frame from webcam
         confidence_threshold: Güven eşiği / Confidence threshold
+        session: Oturumun el takip grafikleri (gr.State) / The session's hand tracking graphs (gr.State)
     
     Returns:
         processed_frame: İşlenmiş frame / Processed frame
         feedback: Analiz sonucu / Analysis result
+        session: Aynı oturum durumu / The same session state
     """
     if frame is None:
-        return None, "Kamera verisi yok / No camera data"
+        return None, "Kamera verisi yok / No camera data", session
     
-    # El tespit edici başlat / Initialize hands detector
-    with mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=2,
-        min_detection_confidence=confidence_threshold,
-        min_tracking_confidence=confidence_threshold
-    ) as hands:
-        
-        # BGR'den RGB'ye dönüştür / Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Frame'i işle / Process frame
-        results = hands.process(rgb_frame)
-        
-        feedback = ""
-        
-        # Sonuçları çiz ve analiz yap / Draw results and analyze
-        if results.multi_hand_landmarks:
-            for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                # El landmark'larını çiz / Draw hand landmarks
-                mp_drawing.draw_landmarks(
-                    rgb_frame,
-                    hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing_styles.get_default_hand_landmarks_style(),
-                    mp_drawing_styles.get_default_hand_connections_style()
-                )
-                
-                # El analizini yap / Perform hand analysis
-                hand_feedback = analyze_hand_gestures(hand_landmarks.landmark)
-                feedback += f"El {i+1} / Hand {i+1}:\n{hand_feedback}\n\n"
-        else:
-            feedback = "El tespit edilemedi. Elinizi kameraya gösterin. / No hands detected. Show your hand to the camera."
-        
-        return rgb_frame, feedback
+    if session is None:
+        session = _HandsSession()
+    
+    # Bu oturumda bir kare işlenirken gelen kare düşürülür, çıktı değişmez
+    # A frame arriving while this session is busy is dropped and the outputs stay as they are
+    if not session.busy.acquire(blocking=False):
+        return gr.skip(), gr.skip(), session
+    
+    try:
+        processed_frame, feedback = _track_hands(session.hands.get(round(float(confidence_threshold), 1)), frame)
+    finally:
+        session.busy.release()
+    
+    return processed_frame, feedback, session
+
+def _close_session(session):
+    """Oturum kapanınca Hands grafiklerini serbest bırak / Release the Hands graphs when the session ends"""
+    if session is not None:
+        session.close()
+
+def _track_hands(hands, frame):
+    """Oturumun tespit edicisiyle elleri izle ve analiz et / Track and analyze hands with the session's detector"""
+    # Gradio karesi zaten RGB; çıkarımdan önce küçült / Gradio frames are already RGB; downscale before inference
+    small_frame = resize_for_inference(frame)
+    
+    # Frame'i işle; landmark'lar normalize olduğundan tam kareye çizilir
+    # Process frame; landmarks are normalized so they are drawn on the full frame
+    results = hands.process(small_frame)
+    
+    # El başına metin bloğu, sonda tek birleştirme / One text block per hand, joined once at the end
+    hand_reports = []
+    
+    # Sonuçları çiz ve analiz yap / Draw results and analyze
+    if results.multi_hand_landmarks:
+        for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+            # El landmark'larını çiz / Draw hand landmarks
+            mp_drawing.draw_landmarks(
+                frame,
+                hand_landmarks,
+                mp_hands.HAND_CONNECTIONS,
+                _HAND_LM_STYLE,
+                _HAND_CONN_STYLE
+            )
+            
+            # El analizini yap / Perform hand analysis
+            hand_feedback = analyze_hand_gestures(hand_landmarks.landmark)
+            hand_reports.append(f"El {i+1} / Hand {i+1}:\n{hand_feedback}")
+    else:
+        return frame, _NO_HANDS_FEEDBACK
+    
+    return frame, "\n\n".join(hand_reports)
 
 # Gradio arayüzünü oluştur / Create Gradio interface
 with gr.Blocks(
@@ -199,6 +229,9 @@ with gr.Blocks(
     This application provides real-time hand tracking with detailed gesture analysis and finger position detection.
     """)
     
+    # Oturum başına Hands grafikleri, ilk karede kurulur / Per-session Hands graphs, built on the first frame
+    session_state = gr.State(None, delete_callback=_close_session)
+    
     with gr.Row():
         with gr.Column():
             # Güven eşiği ayarı / Confidence threshold setting
@@ -222,7 +255,8 @@ with gr.Blocks(
             output_image = gr.Image(
                 streaming=True,
                 label="Hand Tracking Output",
-                height=400
+                height=400,
+                format="jpeg"  # PNG yerine küçük JPEG kareler / Small JPEG frames instead of PNG
             )
             
             feedback_text = gr.Textbox(
@@ -233,13 +267,13 @@ with gr.Blocks(
                 placeholder="Hand analysis will appear here..."
             )
     
-    # Canlı işleme arayüzü / Live processing interface
-    gr.Interface(
+    # Canlı işleme: webcam akışı doğrudan bağlanır / Live processing: the webcam stream is wired directly
+    input_image.stream(
         fn=webcam_interface,
-        inputs=[input_image, confidence_slider],
-        outputs=[output_image, feedback_text],
-        live=True,
-        allow_flagging="never"
+        inputs=[input_image, confidence_slider, session_state],
+        outputs=[output_image, feedback_text, session_state],
+        stream_every=0.05,
+        show_progress="hidden"
     )
     
     # Kullanım bilgileri / Usage information
@@ -0,0 +1,122 @@
+# MediaPipe çözüm önbellekleri / MediaPipe solution caches
+import threading
+from functools import lru_cache
+
+import mediapipe as mp
+
+mp_pose = mp.solutions.pose
+mp_hands = mp.solutions.hands
+
+# MediaPipe grafikleri iş parçacığı güvenli değil / MediaPipe graphs are not thread-safe
+HANDS_LOCK = threading.Lock()
+
+class PoseCache:
+    """
+    Tek sahip için karmaşıklık başına bir Pose / One Pose per model complexity for a single owner
+    
+    Takip modundaki Pose grafikleri kareler arası durum tutar ve iş parçacığı güvenli değildir;
+    bu yüzden analizciler arasında paylaşılmaz, her analizci kendi önbelleğini tutar.
+    Tracking-mode Pose graphs keep state between frames and are not thread-safe, so they
+    are never shared between analyzers; each analyzer owns its own cache.
+    
+    Args:
+        min_tracking_confidence: Takip güven eşiği / Tracking confidence threshold
+    """
+    
+    def __init__(self, min_tracking_confidence=0.5):
+        self.min_tracking_confidence = min_tracking_confidence
+        self._poses = {}
+    
+    def get(self, model_complexity=0):
+        """
+        Karmaşıklığa ait Pose'u döndür, ilk istekte kur / Return the Pose for a complexity, built on first request
+        
+        Args:
+            model_complexity: 0 = Lite (en hızlı / fastest), 1 = Full, 2 = Heavy
+        """
+        pose = self._poses.get(model_complexity)
+        if pose is None:
+            pose = self._poses[model_complexity] = mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                enable_segmentation=False,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=self.min_tracking_confidence
+            )
+        return pose
+    
+    def close(self):
+        """Tüm Pose grafiklerini kapat / Close all Pose graphs"""
+        for pose in self._poses.values():
+            pose.close()
+        self._poses.clear()
+
+class HandsCache:
+    """
+    Tek sahip için eşik başına bir takip modu Hands / One tracking-mode Hands per threshold for a single owner
+    
+    PoseCache gibi: takip grafikleri kareler arası durum tutar, bu yüzden her oturum kendi önbelleğini tutar.
+    Like PoseCache: tracking graphs keep state between frames, so each session owns its own cache.
+    
+    Args:
+        max_num_hands: Tespit edilecek en fazla el / Maximum number of hands to detect
+    """
+    
+    def __init__(self, max_num_hands=2):
+        self.max_num_hands = max_num_hands
+        self._hands = {}
+    
+    def get(self, confidence=0.5):
+        """
+        Eşiğe ait Hands'i döndür, ilk istekte kur / Return the Hands for a threshold, built on first request
+        
+        Args:
+            confidence: Tespit ve takip güven eşiği / Detection and tracking confidence threshold
+        """
+        # Anahtar her zaman aynı biçimde: get() ile get(0.5) aynı grafiği alır
+        # The key always has the same form: get() and get(0.5) get the same graph
+        confidence = round(float(confidence), 2)
+        hands = self._hands.get(confidence)
+        if hands is None:
+            hands = self._hands[confidence] = mp_hands.Hands(
+                static_image_mode=False,           # Video akışı için False / False for video stream
+                max_num_hands=self.max_num_hands,  # En fazla el sayısı / Maximum number of hands
+                min_detection_confidence=confidence, # Minimum tespit güven skoru / Minimum detection confidence
+                min_tracking_confidence=confidence   # Minimum takip güven skoru / Minimum tracking confidence
+            )
+        return hands
+    
+    def close(self):
+        """Tüm Hands grafiklerini kapat / Close all Hands graphs"""
+        for hands in self._hands.values():
+            hands.close()
+        self._hands.clear()
+
+def get_hands(confidence=0.5, max_num_hands=2):
+    """
+    Güven eşiği başına tek bir paylaşılan, durumsuz el tespit edici / One shared, stateless hands detector per confidence threshold
+    
+    Tek görüntü modunda çalışır, kareler arası takip durumu tutmaz; yine de grafik iş parçacığı
+    güvenli olmadığından çağrılar HANDS_LOCK ile yapılır. Akışlar için HandsCache kullanılır.
+    Runs in static image mode and keeps no tracking state between frames; the graph is still not
+    thread-safe, so calls are made under HANDS_LOCK. Streams use HandsCache instead.
+    
+    Args:
+        confidence: Tespit güven eşiği / Detection confidence threshold
+        max_num_hands: Tespit edilecek en fazla el / Maximum number of hands to detect
+    
+    Returns:
+        hands: Çağrılar arasında yeniden kullanılan tespit edici / Detector reused across calls
+    """
+    # Anahtar her zaman aynı biçimde: get_hands() ile get_hands(0.5) aynı grafiği alır
+    # The key always has the same form: get_hands() and get_hands(0.5) get the same graph
+    return _cached_hands(round(float(confidence), 2), int(max_num_hands))
+
+@lru_cache(maxsize=None)
+def _cached_hands(confidence, max_num_hands):
+    """Normalize edilmiş anahtarla el tespit edici kur / Build a hands detector for a normalized key"""
+    return mp_hands.Hands(
+        static_image_mode=True,       # Paylaşıldığı için takip yok / No tracking since it is shared
+        max_num_hands=max_num_hands,  # En fazla el sayısı / Maximum number of hands
+        min_detection_confidence=confidence  # Minimum tespit güven skoru / Minimum detection confidence
+    )
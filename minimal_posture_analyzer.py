@@ -3,136 +3,285 @@ import cv2
 import mediapipe as mp
 import gradio as gr
 import numpy as np
+import threading
+from frame_pipeline import FramePool, LatestFrameWorker, inference_shape, resize_for_inference
 
 # MediaPipe başlatma / Initialize MediaPipe
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
 
-def analyze_posture(image):
-    """Postür analiz fonksiyonu / Posture analysis function"""
-    if image is None:
-        return None, "❌ Görüntü yok / No image"
-    
-    # MediaPipe Pose başlat / Initialize MediaPipe Pose
-    with mp_pose.Pose(
-        static_image_mode=False,
-        model_complexity=1,
-        enable_segmentation=False,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    ) as pose:
-        
-        # BGR'den RGB'ye çevir / Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Pose tespiti / Pose detection
-        results = pose.process(rgb_image)
+# Landmark indeksleri, içe aktarmada bir kez çözülür / Landmark indices, resolved once at import
+_NOSE = mp_pose.PoseLandmark.NOSE.value
+_LEFT_SHOULDER = mp_pose.PoseLandmark.LEFT_SHOULDER.value
+_RIGHT_SHOULDER = mp_pose.PoseLandmark.RIGHT_SHOULDER.value
+_LEFT_ELBOW = mp_pose.PoseLandmark.LEFT_ELBOW.value
+_RIGHT_ELBOW = mp_pose.PoseLandmark.RIGHT_ELBOW.value
+_LEFT_HIP = mp_pose.PoseLandmark.LEFT_HIP.value
+_RIGHT_HIP = mp_pose.PoseLandmark.RIGHT_HIP.value
+
+# İskelet kenar listesi ve çizim renkleri (RGB) / Skeleton edge list and drawing colors (RGB)
+_CONNECTIONS = np.array(sorted(mp_pose.POSE_CONNECTIONS), dtype=np.int32)
+_EDGE_COLOR = (224, 224, 224)
+_JOINT_COLOR = (255, 0, 0)
+
+# Hareketsiz karede çıkarımı atla / Skip inference on still frames
+_STILL_DIFF = 2.0       # 32x32 gri küçük resimde ortalama fark / Mean difference on a 32x32 gray thumbnail
+_STILL_MIN_VIS = 0.7    # Yeniden kullanım için en düşük görünürlük / Minimum visibility for reuse
+_MAX_SKIPPED = 10       # Kaymayı önlemek için en fazla atlanan kare / Maximum skipped frames to avoid drift
+
+# İlk sonuç için en fazla bekleme (saniye) / Maximum wait for the first result (seconds)
+_FIRST_RESULT_TIMEOUT = 2.0
+
+# Sabit geri bildirim metinleri / Fixed feedback messages
+_MSG_LEFT_SHOULDER_HIGH = "⚠️ Sol omuz yüksek / Left shoulder high"
+_MSG_RIGHT_SHOULDER_HIGH = "⚠️ Sağ omuz yüksek / Right shoulder high"
+_MSG_SHOULDERS_LEVEL = "✅ Omuzlar seviyeli / Shoulders level"
+_MSG_LEFT_ELBOW_VISIBLE = "📐 Sol dirsek görünür / Left elbow visible"
+_MSG_RIGHT_ELBOW_VISIBLE = "📐 Sağ dirsek görünür / Right elbow visible"
+_MSG_LEFT_HIP_HIGH = "⚠️ Sol kalça yüksek / Left hip high"
+_MSG_RIGHT_HIP_HIGH = "⚠️ Sağ kalça yüksek / Right hip high"
+_MSG_HIPS_LEVEL = "✅ Kalçalar seviyeli / Hips level"
+_MSG_NECK_LEFT = "🔍 Boyun sola eğik / Neck tilted left"
+_MSG_NECK_RIGHT = "🔍 Boyun sağa eğik / Neck tilted right"
+_MSG_NECK_CENTERED = "🔍 Boyun merkezi / Neck centered"
+
+# Seviye kontrolleri: omuz (y), kalça (y), boyun (x) / Level checks: shoulders (y), hips (y), neck (x)
+# Sol değer a, sağ değer (b1 + b2) / 2; boyunda sağ değer omuz merkezidir
+# Left value a, right value (b1 + b2) / 2; for the neck the right value is the shoulder center
+_LEVEL_A = np.array([_LEFT_SHOULDER, _LEFT_HIP, _NOSE])
+_LEVEL_B1 = np.array([_RIGHT_SHOULDER, _RIGHT_HIP, _LEFT_SHOULDER])
+_LEVEL_B2 = np.array([_RIGHT_SHOULDER, _RIGHT_HIP, _RIGHT_SHOULDER])
+_LEVEL_COLS = np.array([1, 1, 0])
+_LEVEL_THRESHOLDS = np.array([0.05, 0.03, 0.08], dtype=np.float32)
+# Durum 0 = sol, 1 = sağ, 2 = seviyeli / State 0 = left, 1 = right, 2 = level
+_LEVEL_MESSAGES = (
+    (_MSG_LEFT_SHOULDER_HIGH, _MSG_RIGHT_SHOULDER_HIGH, _MSG_SHOULDERS_LEVEL),
+    (_MSG_LEFT_HIP_HIGH, _MSG_RIGHT_HIP_HIGH, _MSG_HIPS_LEVEL),
+    (_MSG_NECK_LEFT, _MSG_NECK_RIGHT, _MSG_NECK_CENTERED)
+)
+
+_TRACKED = np.unique(np.concatenate([_LEVEL_A, _LEVEL_B1, [_LEFT_ELBOW, _RIGHT_ELBOW]]))
+
+_NO_BODY_FEEDBACK = "\n".join([
+    "❌ Vücut tespit edilemedi / Body not detected",
+    "📍 Kameraya daha yakın durun / Stand closer to camera"
+])
+
+def _landmarks_array(pose_landmarks):
+    """Landmark'ları tek (33, 4) diziye al / Extract landmarks into one (33, 4) array
+    
+    Sütunlar / Columns: x, y, z, visibility
+    """
+    return np.fromiter(
+        (v for p in pose_landmarks.landmark for v in (p.x, p.y, p.z, p.visibility)),
+        dtype=np.float32,
+        count=33 * 4
+    ).reshape(33, 4)
+
+class _PostureSession:
+    """
+    Bir Gradio oturumunun çıkarım durumu / Inference state of one Gradio session
+    
+    Takip modundaki Pose, son sonuç ve küçük resim oturumlar arasında paylaşılmaz
+    The tracking-mode Pose, latest result and thumbnail are never shared between sessions
+    """
+    
+    def __init__(self):
+        # Tek Lite Pose nesnesi, kareler arasında takip korunur / Single Lite Pose object, tracking is kept across frames
+        self.pose = mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=0,
+            enable_segmentation=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        self.frame_pool = FramePool()  # Yeniden kullanılacak kare tamponları / Frame buffers ready for reuse
+        self.last_thumb = None         # Son gönderilen karenin küçük resmi / Thumbnail of the last submitted frame
+        self.skipped = 0               # Art arda atlanan kare sayısı / Consecutive skipped frames
+        self.busy = threading.Lock()
         
-        # Çizim için BGR'ye geri çevir / Convert back to BGR
-        output_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
+        # Yakalama ve çıkarım ayrı iş parçacıklarında / Capture and inference run on separate threads
+        self.worker = LatestFrameWorker(self._infer, release=self.frame_pool.release)
+    
+    def _infer(self, frame):
+        """Pose tespiti, landmark'lar (33, 4) dizi olarak / Pose detection, landmarks as a (33, 4) array"""
+        results = self.pose.process(frame)
+        if not results.pose_landmarks:
+            return None
+        return _landmarks_array(results.pose_landmarks)
+    
+    def is_still(self, image, lm):
+        """Kare öncekine benziyor ve landmark'lar güvenilir mi / Is the frame unchanged with reliable landmarks"""
+        thumb = cv2.cvtColor(cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA), cv2.COLOR_RGB2GRAY)
         
-        feedback = []
+        still = (
+            self.last_thumb is not None
+            and lm is not None
+            and self.skipped < _MAX_SKIPPED
+            and lm[_TRACKED, 3].min() > _STILL_MIN_VIS
+            and np.abs(thumb.astype(np.int16) - self.last_thumb).mean() < _STILL_DIFF
+        )
         
-        if results.pose_landmarks:
-            # Landmark'ları çiz / Draw landmarks
-            mp_drawing.draw_landmarks(
-                output_image,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS
-            )
-            
-            landmarks = results.pose_landmarks.landmark
-            
-            # Görünür parçaları kontrol et / Check visible parts
-            visible_parts = []
-            
-            # Baş kontrolü / Head check
-            if landmarks[mp_pose.PoseLandmark.NOSE.value].visibility > 0.5:
-                visible_parts.append("Baş/Head")
-            
-            # Omuz kontrolü / Shoulder check
-            left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-            right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-            
-            if left_shoulder.visibility > 0.5 and right_shoulder.visibility > 0.5:
-                visible_parts.append("Omuzlar/Shoulders")
-                
-                # Omuz seviyesi / Shoulder level
-                shoulder_diff = abs(left_shoulder.y - right_shoulder.y)
-                if shoulder_diff > 0.05:
-                    if left_shoulder.y < right_shoulder.y:
-                        feedback.append("⚠️ Sol omuz yüksek / Left shoulder high")
-                    else:
-                        feedback.append("⚠️ Sağ omuz yüksek / Right shoulder high")
-                else:
-                    feedback.append("✅ Omuzlar seviyeli / Shoulders level")
-            
-            # Dirsek kontrolü / Elbow check
-            left_elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-            right_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-            
-            if left_elbow.visibility > 0.5 and right_elbow.visibility > 0.5:
-                visible_parts.append("Dirsekler/Elbows")
-                
-                # Basit dirsek açısı tahmini / Simple elbow angle estimation
-                if left_elbow.visibility > 0.7:
-                    feedback.append("📐 Sol dirsek görünür / Left elbow visible")
-                if right_elbow.visibility > 0.7:
-                    feedback.append("📐 Sağ dirsek görünür / Right elbow visible")
-            
-            # Kalça kontrolü / Hip check
-            left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-            right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-            
-            if left_hip.visibility > 0.5 and right_hip.visibility > 0.5:
-                visible_parts.append("Kalçalar/Hips")
-                
-                # Kalça seviyesi / Hip level
-                hip_diff = abs(left_hip.y - right_hip.y)
-                if hip_diff > 0.03:
-                    if left_hip.y < right_hip.y:
-                        feedback.append("⚠️ Sol kalça yüksek / Left hip high")
-                    else:
-                        feedback.append("⚠️ Sağ kalça yüksek / Right hip high")
-                else:
-                    feedback.append("✅ Kalçalar seviyeli / Hips level")
-            
-            # Boyun pozisyonu / Neck position
-            nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-            if nose.visibility > 0.5 and left_shoulder.visibility > 0.5 and right_shoulder.visibility > 0.5:
-                shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-                head_offset = abs(nose.x - shoulder_center_x)
-                
-                if head_offset > 0.08:
-                    if nose.x < shoulder_center_x:
-                        feedback.append("🔍 Boyun sola eğik / Neck tilted left")
-                    else:
-                        feedback.append("🔍 Boyun sağa eğik / Neck tilted right")
-                else:
-                    feedback.append("🔍 Boyun merkezi / Neck centered")
-            
-            # Görünür parçaları listele / List visible parts
-            if visible_parts:
-                feedback.insert(0, f"✅ Görünen: {', '.join(visible_parts)}")
-                feedback.insert(1, "")
+        if still:
+            self.skipped += 1
         else:
-            feedback.append("❌ Vücut tespit edilemedi / Body not detected")
-            feedback.append("📍 Kameraya daha yakın durun / Stand closer to camera")
+            self.last_thumb = thumb.astype(np.int16)
+            self.skipped = 0
+        return still
+    
+    def close(self):
+        """Çalışanı durdur, sonra Pose'u kapat / Stop the worker, then close Pose"""
+        if self.worker.close():
+            self.pose.close()
+
+def _draw_pose(image, lm, vis):
+    """İskeleti landmark dizisinden çiz / Draw the skeleton from the landmark array"""
+    h, w = image.shape[:2]
+    pts = (lm[:, :2] * (w, h)).astype(np.int32)
+    
+    # Yalnızca iki ucu görünür kenarlar / Only edges with both ends visible
+    edges = _CONNECTIONS[vis[_CONNECTIONS].all(axis=1)]
+    if len(edges):
+        cv2.polylines(image, list(pts[edges]), False, _EDGE_COLOR, 2)
+    
+    for x, y in pts[vis]:
+        cv2.circle(image, (int(x), int(y)), 2, _JOINT_COLOR, 2)
+
+def analyze_posture(image, session=None):
+    """Postür analiz fonksiyonu / Posture analysis function
+    
+    Her oturumun kendi Pose'u ve çalışanı vardır; landmark'lar başka bir oturumun karesinden gelmez
+    Each session owns its Pose and worker; landmarks never come from another session's frame
+    """
+    if image is None:
+        return None, "❌ Görüntü yok / No image", session
+    
+    if session is None:
+        session = _PostureSession()
+    
+    # Bu oturumda bir kare işlenirken gelen kare düşürülür, çıktı değişmez
+    # A frame arriving while this session is busy is dropped and the outputs stay as they are
+    if not session.busy.acquire(blocking=False):
+        return gr.skip(), gr.skip(), session
+    
+    try:
+        output_image, feedback = _analyze(session, image)
+    finally:
+        session.busy.release()
+    
+    return output_image, feedback, session
+
+def _close_session(session):
+    """Oturum kapanınca çalışanı ve Pose'u serbest bırak / Release the worker and Pose when the session ends"""
+    if session is not None:
+        session.close()
+
+def _analyze(session, image):
+    """Oturumun en son çıkarım sonucuyla analiz et / Analyze with the session's latest inference result"""
+    worker = session.worker
+    
+    # Çizim ve analiz en son çıkarım sonucunu kullanır / Drawing and analysis use the latest inference result
+    lm = worker.latest
+    
+    # Gradio görüntüsü zaten RGB; kare yerinde çizildiği için kopyası gönderilir
+    # Gradio images are already RGB; a copy is queued since the frame is drawn in place
+    # Çıkarım için küçültülür; landmark'lar normalize olduğundan tam kareye çizilir
+    # Downscaled for inference; landmarks are normalized so they are drawn on the full frame
+    # Hareketsiz karede son landmark'lar yeniden kullanılır / Still frames reuse the last landmarks
+    if not session.is_still(image, lm):
+        frame = resize_for_inference(image, session.frame_pool.get(inference_shape(image), image.dtype))
+        worker.submit(frame)
+    
+    # Önceki sonuç yoksa bu karenin çıkarımını bekle (eşzamanlı) / Without a prior result, wait for this frame's inference (synchronous)
+    if worker.latest is None and worker.error is None:
+        worker.wait_first(_FIRST_RESULT_TIMEOUT)
+        lm = worker.latest
+    
+    # Landmark'lar doğrudan giriş görüntüsüne çizilir / Landmarks are drawn straight onto the input image
+    output_image = image
+    
+    if worker.error is not None:
+        return output_image, f"⚠️ Çıkarım hatası / Inference error: {worker.error}"
+    
+    if lm is None:
+        return output_image, _NO_BODY_FEEDBACK
+    
+    feedback = []
+    
+    # Tüm görünürlük kontrolleri tek maskede / All visibility checks in one mask
+    vis = lm[:, 3] > 0.5
+    
+    # Landmark'ları çiz / Draw landmarks
+    _draw_pose(output_image, lm, vis)
+    
+    # Omuz, kalça ve boyun tek vektör karşılaştırmasında / Shoulders, hips and neck in one vector comparison
+    level_vis = vis[_LEVEL_A] & vis[_LEVEL_B1] & vis[_LEVEL_B2]
+    diff = lm[_LEVEL_A, _LEVEL_COLS] - (lm[_LEVEL_B1, _LEVEL_COLS] + lm[_LEVEL_B2, _LEVEL_COLS]) / 2
+    level_state = np.where(np.abs(diff) > _LEVEL_THRESHOLDS, (diff >= 0).astype(np.int8), 2)
+    
+    # Görünür parçaları kontrol et / Check visible parts
+    visible_parts = []
+    
+    # Baş kontrolü / Head check
+    if vis[_NOSE]:
+        visible_parts.append("Baş/Head")
+    
+    # Omuz kontrolü ve seviyesi / Shoulder check and level
+    if level_vis[0]:
+        visible_parts.append("Omuzlar/Shoulders")
+        feedback.append(_LEVEL_MESSAGES[0][level_state[0]])
+    
+    # Dirsek kontrolü / Elbow check
+    if vis[_LEFT_ELBOW] and vis[_RIGHT_ELBOW]:
+        visible_parts.append("Dirsekler/Elbows")
         
-        return output_image, "\n".join(feedback)
+        # Basit dirsek açısı tahmini / Simple elbow angle estimation
+        if lm[_LEFT_ELBOW, 3] > 0.7:
+            feedback.append(_MSG_LEFT_ELBOW_VISIBLE)
+        if lm[_RIGHT_ELBOW, 3] > 0.7:
+            feedback.append(_MSG_RIGHT_ELBOW_VISIBLE)
+    
+    # Kalça kontrolü ve seviyesi / Hip check and level
+    if level_vis[1]:
+        visible_parts.append("Kalçalar/Hips")
+        feedback.append(_LEVEL_MESSAGES[1][level_state[1]])
+    
+    # Boyun pozisyonu / Neck position
+    if level_vis[2]:
+        feedback.append(_LEVEL_MESSAGES[2][level_state[2]])
+    
+    # Görünür parçaları başa ekle / Put visible parts first
+    if visible_parts:
+        return output_image, "\n".join([f"✅ Görünen: {', '.join(visible_parts)}", "", *feedback])
+    
+    return output_image, "\n".join(feedback)
 
 # Gradio arayüzü / Gradio interface
-iface = gr.Interface(
-    fn=analyze_posture,
-    inputs=gr.Image(sources=["webcam"]),
-    outputs=[
-        gr.Image(label="🎯 Analiz / Analysis"),
-        gr.Textbox(label="📊 Geri Bildirim / Feedback", lines=8)
-    ],
-    title="🎯 Minimal Posture Analyzer",
-    description="Basit postür analizi - kameranın gördüklerini anında değerlendirir",
-    live=True
-)
+with gr.Blocks(title="🎯 Minimal Posture Analyzer") as iface:
+    gr.Markdown("""
+    # 🎯 Minimal Posture Analyzer
+    Basit postür analizi - kameranın gördüklerini anında değerlendirir
+    """)
+    
+    # Oturum başına Pose ve çalışan, ilk karede kurulur / Per-session Pose and worker, built on the first frame
+    session_state = gr.State(None, delete_callback=_close_session)
+    
+    with gr.Row():
+        camera_input = gr.Image(sources=["webcam"], streaming=True)
+        
+        with gr.Column():
+            analysis_output = gr.Image(streaming=True, label="🎯 Analiz / Analysis")
+            feedback_output = gr.Textbox(label="📊 Geri Bildirim / Feedback", lines=8)
+    
+    # Kareler WebSocket üzerinden akar / Frames stream over the WebSocket
+    camera_input.stream(
+        fn=analyze_posture,
+        inputs=[camera_input, session_state],
+        outputs=[analysis_output, feedback_output, session_state],
+        stream_every=0.05
+    )
 
 if __name__ == "__main__":
+    # OpenCV tek iş parçacığı; çekirdekler MediaPipe çıkarımına kalır / Single-threaded OpenCV; cores are left to MediaPipe inference
+    # Süreç genelinde etkili olduğundan yalnızca bu uygulama başlatılırken / Process-wide, so only when this app is launched
+    cv2.setNumThreads(1)
     iface.launch(server_port=7865)
@@ -4,246 +4,456 @@ import mediapipe as mp
 import gradio as gr
 import numpy as np
 import math
+import argparse
+import threading
+from itertools import compress
+from mediapipe_pool import PoseCache
+from frame_pipeline import FramePool, LatestFrameWorker, inference_shape, resize_for_inference
 
 # MediaPipe başlatma / Initialize MediaPipe
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 
+# Landmark indeksleri, içe aktarmada bir kez çözülür / Landmark indices, resolved once at import
+_NOSE = mp_pose.PoseLandmark.NOSE.value
+_LEFT_SHOULDER = mp_pose.PoseLandmark.LEFT_SHOULDER.value
+_RIGHT_SHOULDER = mp_pose.PoseLandmark.RIGHT_SHOULDER.value
+_LEFT_ELBOW = mp_pose.PoseLandmark.LEFT_ELBOW.value
+_RIGHT_ELBOW = mp_pose.PoseLandmark.RIGHT_ELBOW.value
+_LEFT_WRIST = mp_pose.PoseLandmark.LEFT_WRIST.value
+_RIGHT_WRIST = mp_pose.PoseLandmark.RIGHT_WRIST.value
+_LEFT_HIP = mp_pose.PoseLandmark.LEFT_HIP.value
+_RIGHT_HIP = mp_pose.PoseLandmark.RIGHT_HIP.value
+_LEFT_KNEE = mp_pose.PoseLandmark.LEFT_KNEE.value
+_RIGHT_KNEE = mp_pose.PoseLandmark.RIGHT_KNEE.value
+_LEFT_ANKLE = mp_pose.PoseLandmark.LEFT_ANKLE.value
+_RIGHT_ANKLE = mp_pose.PoseLandmark.RIGHT_ANKLE.value
+
+# Çizim stili bir kez oluşturulur / Drawing style is built once
+_POSE_LM_STYLE = mp_drawing_styles.get_default_pose_landmarks_style()
+
+# Sabit geri bildirim metinleri / Fixed feedback messages
+_MSG_LEFT_ARM_BENT = "   ⚠️ Sol kol çok bükümlü / Left arm very bent"
+_MSG_LEFT_ARM_STRAIGHT = "   ✅ Sol kol düz pozisyonda / Left arm in straight position"
+_MSG_RIGHT_ARM_BENT = "   ⚠️ Sağ kol çok bükümlü / Right arm very bent"
+_MSG_RIGHT_ARM_STRAIGHT = "   ✅ Sağ kol düz pozisyonda / Right arm in straight position"
+_MSG_LEFT_KNEE_BENT = "   ⚠️ Sol diz bükümlü / Left knee bent"
+_MSG_LEFT_KNEE_STRAIGHT = "   ✅ Sol diz düz / Left knee straight"
+_MSG_LEFT_SHOULDER_HIGH = "⚠️ Sol omuz daha yüksek / Left shoulder higher"
+_MSG_RIGHT_SHOULDER_HIGH = "⚠️ Sağ omuz daha yüksek / Right shoulder higher"
+_MSG_SHOULDERS_LEVEL = "✅ Omuzlar seviyeli / Shoulders level"
+_MSG_HEAD_LEFT = "⚠️ Baş sola eğik / Head tilted left"
+_MSG_HEAD_RIGHT = "⚠️ Baş sağa eğik / Head tilted right"
+_MSG_HEAD_CENTERED = "✅ Baş merkezi pozisyonda / Head centered"
+_MSG_UPRIGHT = "✅ Dik duruş / Upright posture"
+_MSG_FORWARD_HEAD = "⚠️ İleri baş pozisyonu / Forward head posture"
+_MSG_LEFT_HIP_HIGH = "⚠️ Sol kalça daha yüksek / Left hip higher"
+_MSG_RIGHT_HIP_HIGH = "⚠️ Sağ kalça daha yüksek / Right hip higher"
+_MSG_HIPS_LEVEL = "✅ Kalçalar seviyeli / Hips level"
+
+_NO_BODY_FEEDBACK = "\n".join([
+    "❌ Vücut tespit edilemedi / Body not detected",
+    "📍 Kameraya tam vücut görünecek şekilde durun / Stand so full body is visible"
+])
+
 class SimplePostureAnalyzer:
     """Basit postür analiz sınıfı / Simple posture analyzer class"""
     
-    def __init__(self):
-        self.pose = mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,  # Daha hızlı işlem için / Faster processing
-            enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    # Açı üçlüleri: (uç, tepe, uç) / Angle triples: (end, vertex, end)
+    _ANGLE_TRIPLES = np.array([
+        [_LEFT_SHOULDER, _LEFT_ELBOW, _LEFT_WRIST],
+        [_RIGHT_SHOULDER, _RIGHT_ELBOW, _RIGHT_WRIST],
+        [_LEFT_HIP, _LEFT_KNEE, _LEFT_ANKLE]
+    ], dtype=np.int32)
+    
+    # Görünürlüğü kontrol edilen parçalar / Parts whose visibility is checked
+    _PART_NAMES = ('Baş/Head', 'Omuzlar/Shoulders', 'Dirsekler/Elbows', 'Eller/Hands',
+                   'Kalçalar/Hips', 'Dizler/Knees', 'Ayaklar/Feet')
+    # Baş tek noktalı, satır dolsun diye iki kez / Head has one point, repeated to fill the row
+    _PART_IDX = np.array([
+        [_NOSE, _NOSE],
+        [_LEFT_SHOULDER, _RIGHT_SHOULDER],
+        [_LEFT_ELBOW, _RIGHT_ELBOW],
+        [_LEFT_WRIST, _RIGHT_WRIST],
+        [_LEFT_HIP, _RIGHT_HIP],
+        [_LEFT_KNEE, _RIGHT_KNEE],
+        [_LEFT_ANKLE, _RIGHT_ANKLE]
+    ], dtype=np.int32)
+    
+    # Arayüz seçimi -> model karmaşıklığı / UI choice -> model complexity
+    MODEL_CHOICES = {"Lite": 0, "Full": 1}
+    
+    # İlk sonuç için en fazla bekleme (saniye) / Maximum wait for the first result (seconds)
+    _FIRST_RESULT_TIMEOUT = 2.0
+    
+    def __init__(self, model_complexity=0, detect_every=2):
+        if detect_every < 1:
+            raise ValueError(f"detect_every must be >= 1, got {detect_every}")
+        # Lite model en hızlısı; 0.5 takip eşiği onun gürültülü tespitlerini
+        # kareler arası takiple dengeler
+        # Lite is the fastest model; the 0.5 tracking threshold smooths its
+        # noisier single-shot detections through frame-to-frame tracking
+        # Bu analizciye ait Pose grafikleri, başka örnekle paylaşılmaz / Pose graphs owned by this analyzer, never shared
+        self._poses = PoseCache(min_tracking_confidence=0.5)
+        self.model_complexity = model_complexity
+        self.pose = self._poses.get(model_complexity)
+        # Her model değişiminde artar; eski modelin sonuçları atılır
+        # Bumped on every model swap; results from the old model are dropped
+        self._generation = 0
+        self._model = (self._generation, self.pose)  # Çalışanın tek seferde okuduğu çift / Pair the worker reads in one go
+        # Her N karede bir tespit, arada son sonuç / Detect every N frames, reuse the last result in between
+        self.detect_every = detect_every
+        self.frame_idx = 0
+        self.last_landmarks = None
+        self.last_feedback = ""
+        
+        # Çıkarım ayrı iş parçacığında, tek kare bekleyebilir / Inference on its own thread, one frame may wait
+        self._frame_pool = FramePool()  # Yeniden kullanılacak kare tamponları / Frame buffers ready for reuse
+        self._worker = LatestFrameWorker(self._detect, release=self._frame_pool.release)
+        self.busy = threading.Lock()
+    
+    def _detect(self, frame):
+        """
+        Pose tespiti, çıkarım iş parçacığında / Pose detection, on the inference thread
+        
+        Returns:
+            result: (model nesli, landmark'lar) / (model generation, landmarks)
+        """
+        generation, pose = self._model
+        return generation, pose.process(frame).pose_landmarks
+    
+    def close(self):
+        """Çıkarım iş parçacığını durdur, sonra Pose'u kapat / Stop the inference thread, then close Pose"""
+        if self._worker.close():
+            self._poses.close()
     
     def calculate_angle(self, a, b, c):
         """Üç nokta arasındaki açıyı hesapla / Calculate angle between three points"""
-        try:
-            a = np.array(a)  # İlk nokta / First point
-            b = np.array(b)  # Orta nokta / Middle point  
-            c = np.array(c)  # Son nokta / Last point
-            
-            radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-            angle = np.abs(radians * 180.0 / np.pi)
-            
-            if angle > 180.0:
-                angle = 360 - angle
-                
-            return angle
-        except:
+        # a: ilk nokta, b: orta nokta, c: son nokta / a: first point, b: middle point, c: last point
+        # Genel yardımcı; kare başına yol toplu sürümü kullanır / Public utility; the per-frame path uses the batched version
+        # Tepe noktasıyla çakışan nokta açı tanımlamaz / A point on the vertex defines no angle
+        if math.hypot(a[0] - b[0], a[1] - b[1]) < 1e-9 or math.hypot(c[0] - b[0], c[1] - b[1]) < 1e-9:
             return 0
+        
+        # İki bileşenli noktalar için dizi yerine skaler matematik / Scalar math instead of arrays for 2-component points
+        angle = abs(math.degrees(math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])))
+        
+        return 360 - angle if angle > 180.0 else angle
+    
+    def calculate_angles_batch(self, lm_xy):
+        """Tüm eklem üçlülerinin açılarını hesapla / Calculate angles of all joint triples
+        
+        lm_xy: (33, 2) landmark dizisi / (33, 2) landmark array
+        """
+        pts = lm_xy[self._ANGLE_TRIPLES]  # (K, 3, 2), orta nokta tepe / middle point is the vertex
+        v1 = pts[:, 0] - pts[:, 1]
+        v2 = pts[:, 2] - pts[:, 1]
+        radians = np.arctan2(v2[:, 1], v2[:, 0]) - np.arctan2(v1[:, 1], v1[:, 0])
+        angles = np.abs(np.degrees(radians))
+        return np.where(angles > 180.0, 360.0 - angles, angles)
+    
+    def set_model_complexity(self, model_complexity):
+        """Modeli yalnızca değiştiğinde değiştir / Swap the model only when it changes"""
+        if model_complexity != self.model_complexity:
+            self.model_complexity = model_complexity
+            self.pose = self._poses.get(model_complexity)
+            self._generation += 1
+            self._model = (self._generation, self.pose)
+            # Son sonuç silinmez; eski nesil sonuçlar analyze_frame'de atılır
+            # The latest result is kept; old-generation results are dropped in analyze_frame
+            self.last_landmarks = None
     
     def analyze_frame(self, frame):
         """Frame analiz et ve geri bildirim ver / Analyze frame and provide feedback"""
         if frame is None:
             return None, "❌ Kamera bağlantısı yok / No camera connection"
         
-        # BGR'den RGB'ye çevir / Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Gradio karesi zaten RGB, MediaPipe de RGB bekler / Gradio frames are already RGB, as MediaPipe expects
+        # Kare yerinde çizildiği için kopyası gönderilir / A copy is queued since the frame is drawn in place
+        # Kopya, havuzdaki bir tampona küçültülerek yazılır / The copy is downscaled into a pooled buffer
+        # Ara karelerde yeni tespit istenmez / In-between frames request no new detection
+        if self.last_landmarks is None or self.frame_idx % self.detect_every == 0:
+            buf = self._frame_pool.get(inference_shape(frame), frame.dtype)
+            self._worker.submit(resize_for_inference(frame, buf))
+        self.frame_idx += 1
+        
+        # Çizim ve analiz en son çıkarım sonucunu kullanır / Drawing and analysis use the latest inference result
+        # Önceki sonuç yoksa bu karenin çıkarımını bekle / Without a prior result, wait for this frame's inference
+        if self._worker.latest is None and self._worker.error is None:
+            self._worker.wait_first(self._FIRST_RESULT_TIMEOUT)
+        result = self._worker.latest
         
-        # Pose tespiti / Pose detection
-        results = self.pose.process(rgb_frame)
+        # Çizim doğrudan RGB karenin üzerine / Draw directly onto the RGB frame
+        output_frame = frame
         
-        # Çizim için BGR'ye geri çevir / Convert back to BGR for drawing
-        output_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        if self._worker.error is not None:
+            self.last_landmarks = None
+            return output_frame, f"⚠️ Çıkarım hatası / Inference error: {self._worker.error}"
         
-        feedback = []
+        # Eski modelin sonucu: yeni model tespit yapana kadar önceki geri bildirim kalır
+        # Old-model result: the previous feedback stays until the new model has detected
+        if result is not None and result[0] != self._generation:
+            return output_frame, self.last_feedback
+        pose_landmarks = result[1] if result is not None else None
         
-        if results.pose_landmarks:
-            # Landmark'ları çiz / Draw landmarks
-            mp_drawing.draw_landmarks(
-                output_frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style()
-            )
+        if pose_landmarks is None:
+            self.last_landmarks = None
+            self.last_feedback = _NO_BODY_FEEDBACK
+            return output_frame, self.last_feedback
+        
+        # Landmark'ları çiz / Draw landmarks
+        mp_drawing.draw_landmarks(
+            output_frame,
+            pose_landmarks,
+            mp_pose.POSE_CONNECTIONS,
+            landmark_drawing_spec=_POSE_LM_STYLE
+        )
+        
+        # Geri bildirim yalnızca yeni sonuçta üretilir / Feedback is rebuilt only for a new result
+        if pose_landmarks is not self.last_landmarks:
+            self.last_landmarks = pose_landmarks
             
-            # Landmark koordinatlarını al / Get landmark coordinates
-            landmarks = results.pose_landmarks.landmark
+            # Landmark'ları tek seferde (33, 3) diziye al / Extract landmarks into one (33, 3) array at once
+            # Sütunlar / Columns: x, y, visibility
+            landmarks = pose_landmarks.landmark
+            lm = np.fromiter(
+                (v for p in landmarks for v in (p.x, p.y, p.visibility)),
+                dtype=np.float32,
+                count=33 * 3
+            ).reshape(33, 3)
+            xy = lm[:, :2]
+            vis = lm[:, 2]
+            
+            # Tüm kontroller tek listeye yazar / All checks append to a single list
+            feedback = []
             
             # Görünür vücut parçalarını kontrol et / Check visible body parts
-            feedback.extend(self.check_visible_parts(landmarks))
+            self.check_visible_parts(vis, feedback)
             
             # Açı analizleri / Angle analyses
-            feedback.extend(self.analyze_angles(landmarks))
+            self.analyze_angles(xy, feedback)
             
             # Postür kontrolü / Posture check
-            feedback.extend(self.check_posture(landmarks))
+            self.check_posture(xy, feedback)
             
-        else:
-            feedback.append("❌ Vücut tespit edilemedi / Body not detected")
-            feedback.append("📍 Kameraya tam vücut görünecek şekilde durun / Stand so full body is visible")
+            self.last_feedback = "\n".join(feedback)
         
-        return output_frame, "\n".join(feedback)
+        return output_frame, self.last_feedback
     
-    def check_visible_parts(self, landmarks):
+    def check_visible_parts(self, vis, feedback=None):
         """Görünür vücut parçalarını kontrol et / Check visible body parts"""
-        feedback = []
-        
-        # Temel landmark'ların görünürlüğünü kontrol et / Check visibility of basic landmarks
-        key_points = {
-            'Baş/Head': [mp_pose.PoseLandmark.NOSE],
-            'Omuzlar/Shoulders': [mp_pose.PoseLandmark.LEFT_SHOULDER, mp_pose.PoseLandmark.RIGHT_SHOULDER],
-            'Dirsekler/Elbows': [mp_pose.PoseLandmark.LEFT_ELBOW, mp_pose.PoseLandmark.RIGHT_ELBOW],
-            'Eller/Hands': [mp_pose.PoseLandmark.LEFT_WRIST, mp_pose.PoseLandmark.RIGHT_WRIST],
-            'Kalçalar/Hips': [mp_pose.PoseLandmark.LEFT_HIP, mp_pose.PoseLandmark.RIGHT_HIP],
-            'Dizler/Knees': [mp_pose.PoseLandmark.LEFT_KNEE, mp_pose.PoseLandmark.RIGHT_KNEE],
-            'Ayaklar/Feet': [mp_pose.PoseLandmark.LEFT_ANKLE, mp_pose.PoseLandmark.RIGHT_ANKLE]
-        }
-        
-        visible_parts = []
-        for part_name, landmark_indices in key_points.items():
-            if all(landmarks[idx.value].visibility > 0.5 for idx in landmark_indices):
-                visible_parts.append(part_name)
+        if feedback is None:
+            feedback = []
+        
+        # Tüm parçalar tek karşılaştırmada / All parts in a single comparison
+        visible_mask = (vis[self._PART_IDX] > 0.5).all(axis=1)
+        visible_parts = list(compress(self._PART_NAMES, visible_mask))
         
         if visible_parts:
             feedback.append(f"✅ Görünen vücut parçaları / Visible body parts: {', '.join(visible_parts)}")
         
         return feedback
     
-    def analyze_angles(self, landmarks):
+    def analyze_angles(self, lm_xy, feedback=None):
         """Eklem açılarını analiz et / Analyze joint angles"""
-        feedback = []
-        
-        try:
-            # Sol dirsek açısı / Left elbow angle
-            left_shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                           landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            left_elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                         landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-            left_wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                         landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-            
-            left_elbow_angle = self.calculate_angle(left_shoulder, left_elbow, left_wrist)
-            
-            if left_elbow_angle > 0:
-                feedback.append(f"📐 Sol dirsek açısı / Left elbow angle: {left_elbow_angle:.1f}°")
-                if left_elbow_angle < 30:
-                    feedback.append("   ⚠️ Sol kol çok bükümlü / Left arm very bent")
-                elif left_elbow_angle > 160:
-                    feedback.append("   ✅ Sol kol düz pozisyonda / Left arm in straight position")
-            
-            # Sağ dirsek açısı / Right elbow angle
-            right_shoulder = [landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                            landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            right_elbow = [landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                          landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-            right_wrist = [landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                          landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-            
-            right_elbow_angle = self.calculate_angle(right_shoulder, right_elbow, right_wrist)
-            
-            if right_elbow_angle > 0:
-                feedback.append(f"📐 Sağ dirsek açısı / Right elbow angle: {right_elbow_angle:.1f}°")
-                if right_elbow_angle < 30:
-                    feedback.append("   ⚠️ Sağ kol çok bükümlü / Right arm very bent")
-                elif right_elbow_angle > 160:
-                    feedback.append("   ✅ Sağ kol düz pozisyonda / Right arm in straight position")
-            
-            # Diz açıları / Knee angles
-            left_hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                       landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-            left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
-            left_ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                         landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
-            
-            left_knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
-            
-            if left_knee_angle > 0:
-                feedback.append(f"🦵 Sol diz açısı / Left knee angle: {left_knee_angle:.1f}°")
-                if left_knee_angle < 160:
-                    feedback.append("   ⚠️ Sol diz bükümlü / Left knee bent")
-                else:
-                    feedback.append("   ✅ Sol diz düz / Left knee straight")
+        if feedback is None:
+            feedback = []
+        
+        # Tüm eklem üçlülerinin açıları tek seferde / Angles of all joint triples in one pass
+        left_elbow_angle, right_elbow_angle, left_knee_angle = self.calculate_angles_batch(lm_xy)
         
-        except Exception as e:
-            feedback.append(f"⚠️ Açı hesaplama hatası / Angle calculation error: {str(e)}")
+        # Sol dirsek açısı / Left elbow angle
+        if left_elbow_angle > 0:
+            feedback.append(f"📐 Sol dirsek açısı / Left elbow angle: {left_elbow_angle:.1f}°")
+            if left_elbow_angle < 30:
+                feedback.append(_MSG_LEFT_ARM_BENT)
+            elif left_elbow_angle > 160:
+                feedback.append(_MSG_LEFT_ARM_STRAIGHT)
+        
+        # Sağ dirsek açısı / Right elbow angle
+        if right_elbow_angle > 0:
+            feedback.append(f"📐 Sağ dirsek açısı / Right elbow angle: {right_elbow_angle:.1f}°")
+            if right_elbow_angle < 30:
+                feedback.append(_MSG_RIGHT_ARM_BENT)
+            elif right_elbow_angle > 160:
+                feedback.append(_MSG_RIGHT_ARM_STRAIGHT)
+        
+        # Diz açıları / Knee angles
+        if left_knee_angle > 0:
+            feedback.append(f"🦵 Sol diz açısı / Left knee angle: {left_knee_angle:.1f}°")
+            if left_knee_angle < 160:
+                feedback.append(_MSG_LEFT_KNEE_BENT)
+            else:
+                feedback.append(_MSG_LEFT_KNEE_STRAIGHT)
         
         return feedback
     
-    def check_posture(self, landmarks):
+    def check_posture(self, lm_xy, feedback=None):
         """Postür kontrolü yap / Check posture"""
-        feedback = []
+        if feedback is None:
+            feedback = []
         
-        try:
-            # Omuz seviyesi kontrolü / Shoulder level check
-            left_shoulder_y = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y
-            right_shoulder_y = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y
-            shoulder_diff = abs(left_shoulder_y - right_shoulder_y)
-            
-            if shoulder_diff > 0.05:  # %5'ten fazla fark / More than 5% difference
-                if left_shoulder_y < right_shoulder_y:
-                    feedback.append("⚠️ Sol omuz daha yüksek / Left shoulder higher")
-                else:
-                    feedback.append("⚠️ Sağ omuz daha yüksek / Right shoulder higher")
-            else:
-                feedback.append("✅ Omuzlar seviyeli / Shoulders level")
-            
-            # Baş pozisyonu / Head position
-            nose = landmarks[mp_pose.PoseLandmark.NOSE.value]
-            left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-            right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-            
-            shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-            head_offset = abs(nose.x - shoulder_center_x)
-            
-            if head_offset > 0.1:  # %10'dan fazla sapma / More than 10% deviation
-                if nose.x < shoulder_center_x:
-                    feedback.append("⚠️ Baş sola eğik / Head tilted left")
-                else:
-                    feedback.append("⚠️ Baş sağa eğik / Head tilted right")
+        # Omuz seviyesi kontrolü / Shoulder level check
+        left_shoulder_y = lm_xy[_LEFT_SHOULDER, 1]
+        right_shoulder_y = lm_xy[_RIGHT_SHOULDER, 1]
+        shoulder_diff = abs(left_shoulder_y - right_shoulder_y)
+        
+        if shoulder_diff > 0.05:  # %5'ten fazla fark / More than 5% difference
+            if left_shoulder_y < right_shoulder_y:
+                feedback.append(_MSG_LEFT_SHOULDER_HIGH)
             else:
-                feedback.append("✅ Baş merkezi pozisyonda / Head centered")
-            
-            # İleri baş pozisyonu kontrolü / Forward head posture check
-            shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
-            if nose.y < shoulder_center_y - 0.15:  # Baş omuzlardan çok yukarıda / Head much above shoulders
-                feedback.append("✅ Dik duruş / Upright posture")
-            elif nose.y > shoulder_center_y - 0.05:  # Baş omuz seviyesine yakın / Head close to shoulder level
-                feedback.append("⚠️ İleri baş pozisyonu / Forward head posture")
-            
-            # Kalça seviyesi / Hip level
-            left_hip_y = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y
-            right_hip_y = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y
-            hip_diff = abs(left_hip_y - right_hip_y)
-            
-            if hip_diff > 0.03:  # %3'ten fazla fark / More than 3% difference
-                if left_hip_y < right_hip_y:
-                    feedback.append("⚠️ Sol kalça daha yüksek / Left hip higher")
-                else:
-                    feedback.append("⚠️ Sağ kalça daha yüksek / Right hip higher")
+                feedback.append(_MSG_RIGHT_SHOULDER_HIGH)
+        else:
+            feedback.append(_MSG_SHOULDERS_LEVEL)
+        
+        # Baş pozisyonu / Head position
+        nose_x, nose_y = lm_xy[_NOSE]
+        left_shoulder = lm_xy[_LEFT_SHOULDER]
+        right_shoulder = lm_xy[_RIGHT_SHOULDER]
+        
+        shoulder_center_x = (left_shoulder[0] + right_shoulder[0]) / 2
+        head_offset = abs(nose_x - shoulder_center_x)
+        
+        if head_offset > 0.1:  # %10'dan fazla sapma / More than 10% deviation
+            if nose_x < shoulder_center_x:
+                feedback.append(_MSG_HEAD_LEFT)
             else:
-                feedback.append("✅ Kalçalar seviyeli / Hips level")
+                feedback.append(_MSG_HEAD_RIGHT)
+        else:
+            feedback.append(_MSG_HEAD_CENTERED)
+        
+        # İleri baş pozisyonu kontrolü / Forward head posture check
+        shoulder_center_y = (left_shoulder_y + right_shoulder_y) / 2
+        if nose_y < shoulder_center_y - 0.15:  # Baş omuzlardan çok yukarıda / Head much above shoulders
+            feedback.append(_MSG_UPRIGHT)
+        elif nose_y > shoulder_center_y - 0.05:  # Baş omuz seviyesine yakın / Head close to shoulder level
+            feedback.append(_MSG_FORWARD_HEAD)
+        
+        # Kalça seviyesi / Hip level
+        left_hip_y = lm_xy[_LEFT_HIP, 1]
+        right_hip_y = lm_xy[_RIGHT_HIP, 1]
+        hip_diff = abs(left_hip_y - right_hip_y)
         
-        except Exception as e:
-            feedback.append(f"⚠️ Postür analiz hatası / Posture analysis error: {str(e)}")
+        if hip_diff > 0.03:  # %3'ten fazla fark / More than 3% difference
+            if left_hip_y < right_hip_y:
+                feedback.append(_MSG_LEFT_HIP_HIGH)
+            else:
+                feedback.append(_MSG_RIGHT_HIP_HIGH)
+        else:
+            feedback.append(_MSG_HIPS_LEVEL)
         
         return feedback
 
-# Global analyzer instance
-analyzer = SimplePostureAnalyzer()
+class VideoStream:
+    """Ayrı iş parçacığında kamera okuyucu / Camera reader on its own thread
+    
+    Yalnızca en son kare tutulur; eski kareler üzerine yazılır
+    Only the newest frame is kept; stale frames are overwritten
+    """
+    
+    def __init__(self, src=0):
+        self.stream = cv2.VideoCapture(src)
+        self.grabbed, self.frame = self.stream.read()
+        self.frame_id = 0
+        self.stopped = False
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._update, daemon=True)
+        self._thread.start()
+        return self
+    
+    def _update(self):
+        while not self.stopped:
+            grabbed, frame = self.stream.read()
+            with self._lock:
+                self.grabbed, self.frame = grabbed, frame
+                self.frame_id += 1
+            if not grabbed:
+                break
+    
+    def read(self):
+        """En son kare ve numarası / Newest frame and its number"""
+        with self._lock:
+            return self.frame_id, self.grabbed, self.frame
+    
+    def stop(self):
+        # Okuyucu durmadan kamera bırakılmaz / The camera is not released before the reader stops
+        self.stopped = True
+        if self._thread is not None:
+            self._thread.join()
+        self.stream.release()
+
+def run_cv_loop(src=0):
+    """Gradio olmadan yerel OpenCV penceresi / Local OpenCV window without Gradio"""
+    analyzer = SimplePostureAnalyzer()
+    stream = VideoStream(src).start()
+    last_id = -1
+    last_feedback = None
+    
+    try:
+        while True:
+            frame_id, grabbed, frame = stream.read()
+            if not grabbed:
+                break
+            
+            # Aynı kare iki kez işlenmez / The same frame is never processed twice
+            if frame_id == last_id:
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+            last_id = frame_id
+            
+            # OpenCV BGR verir, analizci RGB bekler / OpenCV yields BGR, the analyzer expects RGB
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            output_frame, feedback = analyzer.analyze_frame(rgb_frame)
+            
+            if feedback != last_feedback:
+                print(feedback + "\n")
+                last_feedback = feedback
+            
+            cv2.imshow("Simple Posture Analyzer", cv2.cvtColor(output_frame, cv2.COLOR_RGB2BGR))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        stream.stop()
+        analyzer.close()
+        cv2.destroyAllWindows()
+
+def process_video_frame(frame, model_choice="Lite", session_analyzer=None):
+    """Video frame işle / Process video frame
+    
+    Her oturumun kendi analizcisi vardır; landmark'lar ve model seçimi oturumlar arasında paylaşılmaz
+    Each session owns its analyzer; landmarks and the model choice are never shared between sessions
+    """
+    if session_analyzer is None:
+        session_analyzer = SimplePostureAnalyzer()
+    
+    # Bu oturumda bir kare işlenirken gelen kare düşürülür, çıktı değişmez
+    # A frame arriving while this session is busy is dropped and the outputs stay as they are
+    if not session_analyzer.busy.acquire(blocking=False):
+        return gr.skip(), gr.skip(), session_analyzer
+    
+    try:
+        session_analyzer.set_model_complexity(SimplePostureAnalyzer.MODEL_CHOICES[model_choice])
+        output_frame, feedback = session_analyzer.analyze_frame(frame)
+    finally:
+        session_analyzer.busy.release()
+    
+    return output_frame, feedback, session_analyzer
 
-def process_video_frame(frame):
-    """Video frame işle / Process video frame"""
-    return analyzer.analyze_frame(frame)
+def _close_session_analyzer(session_analyzer):
+    """Oturum kapanınca analizciyi serbest bırak / Release the analyzer when the session ends"""
+    if session_analyzer is not None:
+        session_analyzer.close()
 
 # Gradio arayüzü / Gradio interface
-demo = gr.Interface(
-    fn=process_video_frame,
-    inputs=gr.Image(sources=["webcam"], streaming=True, label="📹 Camera Input"),
-    outputs=[
-        gr.Image(streaming=True, label="🎯 Analysis Output"),
-        gr.Textbox(label="📊 Real-time Feedback", lines=15)
-    ],
-    title="🎯 Simple Posture Analyzer",
-    description="""
+with gr.Blocks(title="🎯 Simple Posture Analyzer") as demo:
+    # Açıklama bir kez çizilir, akışla birlikte gönderilmez / The description is rendered once, not sent with the stream
+    gr.Markdown("""
+    # 🎯 Simple Posture Analyzer
     ## Real-time body posture and joint angle analysis
 
     **What it detects:**
@@ -256,14 +466,43 @@ demo = gr.Interface(
     2. Stand 2-3 meters from the camera
     3. Ensure good lighting and plain background
     4. Keep full body visible for best results
-    """,
-    live=True
-)
+    """)
+    
+    # Oturum başına analizci, ilk karede kurulur / Per-session analyzer, built on the first frame
+    session_analyzer = gr.State(None, delete_callback=_close_session_analyzer)
+    
+    with gr.Row():
+        with gr.Column():
+            camera_input = gr.Image(sources=["webcam"], streaming=True, label="📹 Camera Input")
+            model_choice = gr.Radio(list(SimplePostureAnalyzer.MODEL_CHOICES), value="Lite",
+                                    label="🧠 Model", info="Lite: faster, Full: more accurate")
+        
+        with gr.Column():
+            analysis_output = gr.Image(streaming=True, label="🎯 Analysis Output")
+            feedback_output = gr.Textbox(label="📊 Real-time Feedback", lines=15)
+    
+    # Kareler WebSocket üzerinden akar / Frames stream over the WebSocket
+    camera_input.stream(
+        fn=process_video_frame,
+        inputs=[camera_input, model_choice, session_analyzer],
+        outputs=[analysis_output, feedback_output, session_analyzer],
+        stream_every=0.05
+    )
 
 
 if __name__ == "__main__":
-    demo.launch(
-        share=False,
-        server_port=7862,
-        show_error=True
-    )
+    parser = argparse.ArgumentParser(description="Simple Posture Analyzer")
+    parser.add_argument("--local-cv", action="store_true",
+                        help="Gradio yerine yerel OpenCV penceresi / Local OpenCV window instead of Gradio")
+    parser.add_argument("--camera", type=int, default=0,
+                        help="Kamera indeksi (--local-cv) / Camera index (--local-cv)")
+    args = parser.parse_args()
+    
+    if args.local_cv:
+        run_cv_loop(args.camera)
+    else:
+        demo.launch(
+            share=False,
+            server_port=7862,
+            show_error=True
+        )
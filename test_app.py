@@ -1,59 +1,121 @@
 # Test dosyası / Test file
 import sys
 import os
+import argparse
+import importlib
+import importlib.util
+from importlib.metadata import version, PackageNotFoundError
 
-print("Python version:", sys.version)
-print("Current directory:", os.getcwd())
+# OpenCV birden çok dağıtım adıyla kurulabilir / OpenCV can be installed under several distribution names
+_OPENCV_DISTS = ("opencv-python", "opencv-python-headless", "opencv-contrib-python")
 
-try:
-    import cv2
-    print("✅ OpenCV imported successfully")
-except ImportError as e:
-    print("❌ OpenCV import failed:", e)
+def _dist_version(dists):
+    """İlk kurulu dağıtımın adı ve sürümü / Name and version of the first installed distribution"""
+    for dist in dists:
+        try:
+            return dist, version(dist)
+        except PackageNotFoundError:
+            pass
+    return None, None
 
-try:
-    import mediapipe as mp
-    print("✅ MediaPipe imported successfully")
-    print("MediaPipe version:", mp.__version__)
-    
-    # MediaPipe solutions test
+def _opencv_version():
+    """OpenCV sürümü; meta veri yoksa modülden okunur / OpenCV version, read from the module when metadata is missing"""
+    dist, ver = _dist_version(_OPENCV_DISTS)
+    if ver is not None:
+        return dist, ver
     try:
-        mp_pose = mp.solutions.pose
-        mp_hands = mp.solutions.hands
-        mp_drawing = mp.solutions.drawing_utils
-        mp_drawing_styles = mp.solutions.drawing_styles
-        print("✅ MediaPipe solutions imported successfully")
-    except Exception as e:
-        print("❌ MediaPipe solutions import failed:", e)
-        
-except ImportError as e:
-    print("❌ MediaPipe import failed:", e)
-
-try:
-    import gradio as gr
-    print("✅ Gradio imported successfully")
-    print("Gradio version:", gr.__version__)
-except ImportError as e:
-    print("❌ Gradio import failed:", e)
-
-try:
-    import numpy as np
-    print("✅ NumPy imported successfully")
-    print("NumPy version:", np.__version__)
-except ImportError as e:
-    print("❌ NumPy import failed:", e)
-
-# Test our custom modules
-try:
-    from advanced_physiotherapy_algorithms import AdvancedPhysiotherapyAnalyzer
-    print("✅ Advanced physiotherapy algorithms imported successfully")
-except ImportError as e:
-    print("❌ Advanced physiotherapy algorithms import failed:", e)
-
-try:
-    from clinical_feedback_system import ClinicalFeedbackSystem
-    print("✅ Clinical feedback system imported successfully")
-except ImportError as e:
-    print("❌ Clinical feedback system import failed:", e)
-
-print("\n🎯 All imports tested!")
+        import cv2
+    except ImportError:
+        return None, None
+    return "cv2", cv2.__version__
+
+def check_versions():
+    """
+    Kurulu paket sürümlerini yazdır / Print installed package versions
+
+    Returns:
+        missing: Kurulu olmayan paketler / Packages that are not installed
+    """
+    missing = []
+    checks = (("OpenCV", _opencv_version, _OPENCV_DISTS),
+              ("MediaPipe", lambda: _dist_version(("mediapipe",)), ("mediapipe",)),
+              ("Gradio", lambda: _dist_version(("gradio",)), ("gradio",)),
+              ("NumPy", lambda: _dist_version(("numpy",)), ("numpy",)))
+
+    # Sürümler paket meta verisinden okunur, modüller yüklenmez / Versions come from package metadata, modules are not loaded
+    for label, lookup, dists in checks:
+        dist, ver = lookup()
+        if ver is None:
+            print(f"❌ {label} not installed ({' / '.join(dists)})")
+            missing.append(label)
+        else:
+            print(f"✅ {label} installed, version:", ver, f"({dist})")
+    return missing
+
+# Üçüncü taraf modüller ve bu depodaki isteğe bağlı modüller / Third-party modules and optional modules from this repo
+_THIRD_PARTY_MODULES = (("OpenCV", "cv2"), ("MediaPipe", "mediapipe"), ("Gradio", "gradio"), ("NumPy", "numpy"))
+_LOCAL_MODULES = (("Advanced physiotherapy algorithms", "advanced_physiotherapy_algorithms"),
+                  ("Clinical feedback system", "clinical_feedback_system"))
+
+def check_imports():
+    """
+    Modülleri içe aktar ve dene / Import and exercise the modules
+
+    Returns:
+        failed: İçe aktarılamayan modüller / Modules that failed to import
+    """
+    failed = []
+
+    for label, name in _THIRD_PARTY_MODULES:
+        try:
+            importlib.import_module(name)
+            print(f"✅ {label} imported successfully")
+        except ImportError as e:
+            print(f"❌ {label} import failed:", e)
+            failed.append(label)
+
+    # MediaPipe solutions test
+    if "MediaPipe" not in failed:
+        try:
+            solutions = importlib.import_module("mediapipe").solutions
+            for name in ("pose", "hands", "drawing_utils", "drawing_styles"):
+                getattr(solutions, name)
+            print("✅ MediaPipe solutions imported successfully")
+        except Exception as e:
+            print("❌ MediaPipe solutions import failed:", e)
+            failed.append("MediaPipe solutions")
+
+    # Ağaçta olmayan modüller atlanır, hata sayılmaz / Modules missing from the tree are skipped, not failed
+    for label, name in _LOCAL_MODULES:
+        if importlib.util.find_spec(name) is None:
+            print(f"⏭️ {label} not in this tree, skipped ({name})")
+            continue
+        try:
+            importlib.import_module(name)
+            print(f"✅ {label} imported successfully")
+        except ImportError as e:
+            print(f"❌ {label} import failed:", e)
+            failed.append(name)
+
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dependency check")
+    parser.add_argument("--full", action="store_true",
+                        help="Modülleri de içe aktar ve dene / Also import and exercise the modules")
+    args = parser.parse_args()
+
+    print("Python version:", sys.version)
+    print("Current directory:", os.getcwd())
+
+    problems = check_versions()
+    if args.full:
+        problems += check_imports()
+    # Aynı paket iki kontrolde de eksik çıkabilir / The same package can be missing in both checks
+    problems = list(dict.fromkeys(problems))
+
+    # Eksik varsa başarı mesajı yazılmaz / No success message when something is missing
+    if problems:
+        print("\n⚠️ Missing or failed:", ", ".join(problems))
+        sys.exit(1)
+    print("\n🎯 All imports tested!")